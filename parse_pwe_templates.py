@@ -2,17 +2,26 @@ from __future__ import annotations
 
 import collections
 import dataclasses
+import functools
 import keyword
 import logging
+import os
 import re
 import struct
+import sys
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from xml.etree import ElementTree
 
 import inflection
 from frozendict import frozendict
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
 if typing.TYPE_CHECKING:
     from xml.etree.ElementTree import Element
 
@@ -76,6 +85,35 @@ def get_endianness(game_id: str) -> str:
     return ">" if game_id != "PrimeRemastered" else "<"
 
 
+def parse_xml(path: Path) -> Element:
+    """Parses the given XML file and returns its root. Uses lxml's parser when it's available."""
+    if lxml_etree is not None:
+        return lxml_etree.parse(path, lxml_etree.XMLParser(remove_comments=True)).getroot()
+    return ElementTree.parse(path).getroot()
+
+
+def iter_xml_elements(path: Path, depth: int) -> typing.Iterator[Element]:
+    """
+    Incrementally parses the given XML file, yielding every element found at the given depth (the root's children
+    being at depth 1) once it's complete. Each element is discarded once consumed, so the full tree is never in memory.
+    """
+    assert depth >= 1
+    if lxml_etree is not None:
+        events = lxml_etree.iterparse(path, events=("start", "end"), remove_comments=True)
+    else:
+        events = ElementTree.iterparse(path, events=("start", "end"))
+
+    parents: list[Element] = []
+    for event, element in events:
+        if event == "start":
+            parents.append(element)
+        else:
+            parents.pop()
+            if len(parents) == depth:
+                yield element
+                parents[-1].clear()
+
+
 def find_assured(element: Element, path: str) -> Element:
     e = element.find(path)
     assert e is not None
@@ -100,119 +138,196 @@ class EnumDefinition:
         yield from sorted(t.__name__ for t in types)
 
     def get_code(self, game_id: str) -> str:
-        code = ""
+        code: list[str] = []
         endianness = get_endianness(game_id)
 
-        code += f"\n\nclass {_scrub_enum(self.name)}(enum.{self.enum_base}):\n"
+        code.append(f"\n\nclass {_scrub_enum(self.name)}(enum.{self.enum_base}):\n")
         for name, value in self.values.items():
-            code += f"    {_scrub_enum(name)} = {value}\n"
+            code.append(f"    {_scrub_enum(name)} = {value}\n")
 
-        code += "\n    @classmethod\n"
-        code += "    def from_stream(cls, data: typing.BinaryIO, size: int | None = None) -> typing_extensions.Self:\n"
-        code += f"        return cls({_CODE_PARSE_UINT32[endianness]})\n"
+        code.append("\n    @classmethod\n")
+        code.append(
+            "    def from_stream(cls, data: typing.BinaryIO, size: int | None = None) -> typing_extensions.Self:\n"
+        )
+        code.append(f"        return cls({_CODE_PARSE_UINT32[endianness]})\n")
 
-        code += "\n    def to_stream(self, data: typing.BinaryIO) -> None:\n"
-        code += '        data.write(struct.pack("' + endianness + 'L", self.value))\n'
+        code.append("\n    def to_stream(self, data: typing.BinaryIO) -> None:\n")
+        code.append('        data.write(struct.pack("' + endianness + 'L", self.value))\n')
 
-        code += "\n    @classmethod\n"
-        code += "    def from_json(cls, data: json_util.JsonValue) -> typing_extensions.Self:\n"
-        code += f"        assert isinstance(data, ({', '.join(self.value_types)}))\n"
-        code += "        return cls(data)\n"
+        code.append("\n    @classmethod\n")
+        code.append("    def from_json(cls, data: json_util.JsonValue) -> typing_extensions.Self:\n")
+        code.append(f"        assert isinstance(data, ({', '.join(self.value_types)}))\n")
+        code.append("        return cls(data)\n")
 
-        code += f"\n    def to_json(self) -> {' | '.join(self.value_types)}:\n"
-        code += "        return self.value\n"
+        code.append(f"\n    def to_json(self) -> {' | '.join(self.value_types)}:\n")
+        code.append("        return self.value\n")
 
-        return code
+        return "".join(code)
 
 
 _enums_by_game: dict[str, collections.defaultdict[EnumDefinition, list[str]]] = {}
+# For each game, the enums in _enums_by_game by their scrubbed name
+_known_enums_by_game: dict[str, dict[str, EnumDefinition]] = {}
+
+# Enums found while parsing a template file, along with the object that uses them (if any), in the order found.
+# Parsing only records them so it can run in worker processes, and parse_game registers them in _enums_by_game.
+_found_enums: list[tuple[EnumDefinition, str | None]] = []
+
+
+def _found_enum(enum_def: EnumDefinition, path: Path) -> None:
+    _found_enums.append((enum_def, path.stem if path.parent.stem != "Enums" else None))
+
+
+def _register_enum(game_id: str, enum_def: EnumDefinition) -> list[str]:
+    """Adds the enum to the game's enums if it's new. Returns the list of classes using it."""
+    game_enums = _enums_by_game[game_id]
+    if enum_def not in game_enums:
+        game_enums[enum_def] = []
+        _known_enums_by_game[game_id][_scrub_enum(enum_def.name)] = enum_def
+    return game_enums[enum_def]
+
+
+_non_word_re = re.compile(r"\W")
+_non_word_ascii_table = str.maketrans("", "", "".join(c for c in map(chr, range(128)) if _non_word_re.match(c)))
 
 
 def _scrub_enum(string: str) -> str:
-    s = re.sub(r"\W", "", string)  # remove non-word characters
-    s = re.sub(r"^(?=\d)", "_", s)  # add leading underscore to strings starting with a number
-    s = re.sub(r"^None$", "_None", s)  # add leading underscore to None
-    s = s or "_EMPTY"  # add name for empty string keys
-    return s
+    # remove non-word characters
+    if string.isascii():
+        s = string.translate(_non_word_ascii_table)
+    else:
+        s = _non_word_re.sub("", string)
+
+    if s[:1].isdecimal():
+        s = "_" + s  # add leading underscore to strings starting with a number
+    elif s == "None":
+        s = "_None"  # add leading underscore to None
+
+    return s or "_EMPTY"  # add name for empty string keys
 
 
 def create_enums_file(game_id: str, enums: dict[EnumDefinition, list[str]]) -> str:
-    code = '"""\nGenerated file.\n"""\nimport enum\nimport typing\nimport struct\nimport typing_extensions\n'
-    code += "\nfrom retro_data_structures import json_util\n"
+    code = [
+        '"""\nGenerated file.\n"""\nimport enum\nimport typing\nimport struct\nimport typing_extensions\n',
+        "\nfrom retro_data_structures import json_util\n",
+    ]
 
     for e, classes in enums.items():
         if len(classes) != 1:
-            code += e.get_code(game_id)
-
-    return code
-
-
-def _prop_default_value(element: Element, game_id: str, path: Path) -> dict:
-    default_value_types = {
-        "Int": lambda el: struct.unpack("l", struct.pack("L", (int(el.text, 10) & 0xFFFFFFFF)))[0],
-        "Float": lambda el: float(el.text),
-        "Bool": lambda el: el.text == "true",
-        "Short": lambda el: int(el.text, 10) & 0xFFFF,
-        "Color": lambda el: {e.tag: float(e.text) for e in el},
-        "Vector": lambda el: {e.tag: float(e.text) for e in el},
-        "Flags": lambda el: int(el.text, 10) & 0xFFFFFFFF,
-        "Choice": lambda el: int(el.text, 10) & 0xFFFFFFFF,
-        "Enum": lambda el: int(el.text, 16) & 0xFFFFFFFF,
-        "Sound": lambda el: int(el.text, 10) & 0xFFFFFFFF,
-    }
+            code.append(e.get_code(game_id))
+
+    return "".join(code)
+
+
+_hex_int = functools.partial(int, base=16)
+
+
+def _children_by_tag(element: Element) -> dict[str, Element]:
+    children: dict[str, Element] = {}
+    for child in element:
+        children.setdefault(child.tag, child)
+    return children
+
+
+def _default_int32(el: typing.Any) -> int:
+    return struct.unpack("l", struct.pack("L", (int(el.text, 10) & 0xFFFFFFFF)))[0]
+
+
+def _default_uint32(el: typing.Any) -> int:
+    return int(el.text, 10) & 0xFFFFFFFF
 
+
+def _default_hex_uint32(el: typing.Any) -> int:
+    return int(el.text, 16) & 0xFFFFFFFF
+
+
+def _default_uint16(el: typing.Any) -> int:
+    return int(el.text, 10) & 0xFFFF
+
+
+def _default_float(el: typing.Any) -> float:
+    return float(el.text)
+
+
+def _default_bool(el: typing.Any) -> bool:
+    return el.text == "true"
+
+
+def _default_components(el: typing.Any) -> dict[str, float]:
+    return {e.tag: float(e.text) for e in el}
+
+
+def _default_text(el: typing.Any) -> str | None:
+    return el.text
+
+
+_DEFAULT_VALUE_PARSERS: dict[str, typing.Callable[[typing.Any], typing.Any]] = {
+    "Int": _default_int32,
+    "Float": _default_float,
+    "Bool": _default_bool,
+    "Short": _default_uint16,
+    "Color": _default_components,
+    "Vector": _default_components,
+    "Flags": _default_uint32,
+    "Choice": _default_uint32,
+    "Enum": _default_hex_uint32,
+    "Sound": _default_uint32,
+}
+
+
+def _prop_default_value(element: Element, children: dict[str, Element], game_id: str, path: Path) -> dict:
     default_value = None
     has_default = False
-    if (default_value_element := element.find("DefaultValue")) is not None:
-        default_value = default_value_types.get(element.attrib["Type"], lambda el: el.text)(default_value_element)
+    if (default_value_element := children.get("DefaultValue")) is not None:
+        default_value = _DEFAULT_VALUE_PARSERS.get(element.attrib["Type"], _default_text)(default_value_element)
         has_default = True
     return {"has_default": has_default, "default_value": default_value}
 
 
-def _prop_struct(element: Element, game_id: str, path: Path) -> dict:
+def _prop_struct(element: Element, children: dict[str, Element], game_id: str, path: Path) -> dict:
     return {
         "archetype": element.attrib.get("Archetype"),
-        "properties": _parse_properties(element, game_id, path)["properties"],
+        "properties": _parse_properties(element, game_id, path, children)["properties"],
     }
 
 
-def _prop_asset(element: Element, game_id: str, path: Path) -> dict:
+def _prop_asset(element: Element, children: dict[str, Element], game_id: str, path: Path) -> dict:
     type_filter = []
-    if (filt := element.find("TypeFilter")) is not None:
+    if (filt := children.get("TypeFilter")) is not None:
         type_filter = [t.text for t in filt]
     return {"type_filter": type_filter}
 
 
-def _prop_array(element: Element, game_id: str, path: Path) -> dict:
+def _prop_array(element: Element, children: dict[str, Element], game_id: str, path: Path) -> dict:
     # print(ElementTree.tostring(element, encoding='utf8', method='xml'))
     item_archetype = None
-    if (item_archetype_element := element.find("ItemArchetype")) is not None:
+    if (item_archetype_element := children.get("ItemArchetype")) is not None:
         item_archetype = _parse_single_property(item_archetype_element, game_id, path, include_id=False)
     # print(item_archetype)
     return {"item_archetype": item_archetype}
 
 
-def _prop_choice(element: Element, game_id: str, path: Path) -> dict:
-    _parse_choice(element, game_id, path)
+def _prop_choice(element: Element, children: dict[str, Element], game_id: str, path: Path) -> dict:
+    _parse_choice(element, game_id, path, children)
     extras = {"archetype": element.attrib.get("Archetype")}
-    extras.update(_prop_default_value(element, game_id, path))
+    extras.update(_prop_default_value(element, children, game_id, path))
     return extras
 
 
-def _prop_flags(element: Element, game_id: str, path: Path) -> dict:
-    extras = _prop_default_value(element, game_id, path)
-    if (flags_element := element.find("Flags")) is not None:
+def _prop_flags(element: Element, children: dict[str, Element], game_id: str, path: Path) -> dict:
+    extras = _prop_default_value(element, children, game_id, path)
+    if (flags_element := children.get("Flags")) is not None:
         extras["flags"] = {
-            element.attrib["Name"]: int(element.attrib["Mask"], 16) for element in flags_element.findall("Element")
+            element.attrib["Name"]: _hex_int(element.attrib["Mask"]) for element in flags_element.findall("Element")
         }
 
         element_id = element.attrib.get("ID")
 
         name = None
-        if (ele_name := element.find("Name")) is not None:
+        if (ele_name := children.get("Name")) is not None:
             name = ele_name.text
         elif element_id is not None:
-            name = property_names.get(int(element_id, 16))
+            name = property_names.get(_hex_int(element_id))
 
         if name is None:
             name = "Unknown"
@@ -223,28 +338,40 @@ def _prop_flags(element: Element, game_id: str, path: Path) -> dict:
         if name == path.stem:
             name += "Flags"
 
-        enum_uses = _enums_by_game[game_id][EnumDefinition(name, frozendict(extras["flags"]), enum_base="IntFlag")]
-        if path.parent.stem != "Enums":
-            enum_uses.append(path.stem)
+        _found_enum(EnumDefinition(name, frozendict(extras["flags"]), enum_base="IntFlag"), path)
         extras["flagset_name"] = name
 
     return extras
 
 
+_PROPERTY_TYPE_EXTRAS: dict[str, typing.Callable[[Element, dict[str, Element], str, Path], dict]] = {
+    "Struct": _prop_struct,
+    "Asset": _prop_asset,
+    "Array": _prop_array,
+    "Enum": _prop_choice,
+    "Choice": _prop_choice,
+    "Flags": _prop_flags,
+}
+
+
 def _parse_single_property(element: Element, game_id: str, path: Path, include_id: bool = True) -> dict:
     parsed: dict[str, typing.Any] = {}
     if include_id:
-        parsed.update({"id": int(element.attrib["ID"], 16)})
+        parsed.update({"id": _hex_int(element.attrib["ID"])})
+
+    children = _children_by_tag(element)
 
     if (name := element.attrib.get("Name", "")) == "":
-        name_element = element.find("Name")
+        name_element = children.get("Name")
         name = name_element.text if name_element is not None and name_element.text is not None else ""
 
-    cook = element.find("CookPreference")
+    cook = children.get("CookPreference")
+    # Interned, as the type is used to look up and compare a lot during code generation
+    _type = sys.intern(element.attrib["Type"])
 
     parsed.update(
         {
-            "type": element.attrib["Type"],
+            "type": _type,
             "name": name,
             "cook_preference": cook.text if cook is not None and cook.text is not None else "Always",
         }
@@ -255,23 +382,19 @@ def _parse_single_property(element: Element, game_id: str, path: Path, include_i
     if ignore_dependencies_mlvl:
         parsed["ignore_dependencies_mlvl"] = True
 
-    property_type_extras = {
-        "Struct": _prop_struct,
-        "Asset": _prop_asset,
-        "Array": _prop_array,
-        "Enum": _prop_choice,
-        "Choice": _prop_choice,
-        "Flags": _prop_flags,
-    }
-
-    parsed.update(property_type_extras.get(element.attrib["Type"], _prop_default_value)(element, game_id, path))
+    parsed.update(_PROPERTY_TYPE_EXTRAS.get(_type, _prop_default_value)(element, children, game_id, path))
 
     return parsed
 
 
-def _parse_properties(properties: Element, game_id: str, path: Path) -> dict:
+def _parse_properties(
+    properties: Element, game_id: str, path: Path, children: dict[str, Element] | None = None
+) -> dict:
+    if children is None:
+        children = _children_by_tag(properties)
+
     elements = []
-    if (sub_properties := properties.find("SubProperties")) is not None:
+    if (sub_properties := children.get("SubProperties")) is not None:
         for element in sub_properties:
             element = typing.cast("Element", element)
 
@@ -279,28 +402,29 @@ def _parse_properties(properties: Element, game_id: str, path: Path) -> dict:
 
     return {
         "type": "Struct",
-        "name": name.text if (name := properties.find("Name")) is not None else "",
-        "atomic": properties.find("Atomic") is not None,
+        "name": name.text if (name := children.get("Name")) is not None else "",
+        "atomic": "Atomic" in children,
         "incomplete": properties.attrib.get("Incomplete") == "true",
         "properties": elements,
     }
 
 
-def _parse_choice(properties: Element, game_id: str, path: Path) -> dict:
+def _parse_choice(properties: Element, game_id: str, path: Path, children: dict[str, Element] | None = None) -> dict:
+    if children is None:
+        children = _children_by_tag(properties)
+
     _type = properties.attrib.get("Type", "Choice")
-    choices = {}
+    choices: dict[str, int] = {}
 
-    if (values := properties.find("Values")) is not None:
-        for element in values:
-            element = typing.cast("Element", element)
-            choices[element.attrib["Name"]] = int(element.attrib["ID"], 16)
+    if (values := children.get("Values")) is not None:
+        choices = {element.attrib["Name"]: _hex_int(element.attrib["ID"]) for element in values}
 
         name = ""
-        if (ele_name := properties.find("Name")) is not None:
+        if (ele_name := children.get("Name")) is not None:
             assert ele_name.text is not None
             name = ele_name.text
         elif (ele_id := properties.attrib.get("ID")) is not None:
-            name = property_names.get(int(ele_id, 16), path.stem + ele_id)
+            name = property_names.get(_hex_int(ele_id), path.stem + ele_id)
         else:
             return {
                 "type": _type,
@@ -310,9 +434,7 @@ def _parse_choice(properties: Element, game_id: str, path: Path) -> dict:
         if name == path.stem:
             name += "Enum"
 
-        enum_uses = _enums_by_game[game_id][EnumDefinition(name, frozendict(choices), enum_base="IntEnum")]
-        if path.parent.stem != "Enums":
-            enum_uses.append(path.stem)
+        _found_enum(EnumDefinition(name, frozendict(choices), enum_base="IntEnum"), path)
 
     return {
         "type": _type,
@@ -323,28 +445,89 @@ _parse_choice.unknowns = {}  # type: ignore[attr-defined]
 
 
 def parse_script_object_file(path: Path, game_id: str) -> dict:
-    t = ElementTree.parse(path)
-    root = t.getroot()
-    props = find_assured(root, "Properties")
-    result = _parse_properties(props, game_id, path)
+    result = None
+    modules = None
+
+    for element in iter_xml_elements(path, 1):
+        if element.tag == "Properties" and result is None:
+            result = _parse_properties(element, game_id, path)
+        elif element.tag == "Modules" and modules is None:
+            modules = [item.text for item in element.findall("Element")]
 
-    if (modules := root.find("Modules")) is not None:
-        result["modules"] = [item.text for item in modules.findall("Element")]
+    assert result is not None
+    if modules is not None:
+        result["modules"] = modules
 
     return result
 
 
+_ARCHETYPE_PARSERS: dict[str, typing.Callable[[Element, str, Path], dict]] = {
+    "Struct": _parse_properties,
+    "Choice": _parse_choice,
+    "Enum": _parse_choice,
+}
+
+
 def parse_property_archetypes(path: Path, game_id: str) -> dict:
-    t = ElementTree.parse(path)
-    root = t.getroot()
-    archetype = find_assured(root, "PropertyArchetype")
-    _type = archetype.attrib["Type"]
-    if _type == "Struct":
-        return _parse_properties(archetype, game_id, path)
-    elif _type in {"Choice", "Enum"}:
-        return _parse_choice(archetype, game_id, path)
+    result = None
+
+    for archetype in iter_xml_elements(path, 1):
+        if archetype.tag != "PropertyArchetype" or result is not None:
+            continue
+
+        _type = archetype.attrib["Type"]
+        parser = _ARCHETYPE_PARSERS.get(_type)
+        if parser is None:
+            raise ValueError(f"Unknown Archetype format: {_type}")
+        result = parser(archetype, game_id, path)
+
+    assert result is not None
+    return result
+
+
+TemplateParser = typing.Callable[[Path, str], dict]
+
+
+def _parse_template_file(
+    parser: TemplateParser, path: Path, game_id: str
+) -> tuple[dict, list[tuple[EnumDefinition, str | None]]]:
+    _found_enums.clear()
+    result = parser(path, game_id)
+    found_enums = list(_found_enums)
+    _found_enums.clear()
+    return result, found_enums
+
+
+def _init_template_worker(names: dict[int, str]) -> None:
+    global property_names
+    property_names = names
+
+
+def parse_template_files(jobs: list[tuple[TemplateParser, Path]], game_id: str) -> list[dict]:
+    """
+    Parses all the given template files, using a process pool when there's more than one core available.
+    The enums found are registered in _enums_by_game in the same order as parsing them sequentially would.
+    """
+    parsers = [parser for parser, _ in jobs]
+    paths = [path for _, path in jobs]
+    game_ids = [game_id] * len(jobs)
+
+    workers = os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_template_worker, initargs=(property_names,)) as executor:
+            results = list(
+                executor.map(_parse_template_file, parsers, paths, game_ids, chunksize=len(jobs) // workers + 1)
+            )
     else:
-        raise ValueError(f"Unknown Archetype format: {_type}")
+        results = list(map(_parse_template_file, parsers, paths, game_ids))
+
+    for _, found_enums in results:
+        for enum_def, used_by in found_enums:
+            enum_uses = _register_enum(game_id, enum_def)
+            if used_by is not None:
+                enum_uses.append(used_by)
+
+    return [result for result, _ in results]
 
 
 property_names: dict[int, str] = {}
@@ -353,32 +536,28 @@ property_names: dict[int, str] = {}
 def read_property_names(map_path: Path) -> dict[int, str]:
     global property_names
 
-    t = ElementTree.parse(map_path)
-    root = t.getroot()
-    m = find_assured(root, "PropertyMap")
-
     property_names = {
-        int(find_assured(item, "Key").attrib["ID"], 16): find_assured(item, "Value").attrib["Name"]
-        for item in typing.cast("typing.Iterable[Element]", m)
+        _hex_int(key.attrib["ID"]): value.attrib["Name"]
+        for key, value in map(_key_value_pair, iter_xml_elements(map_path, 2))
     }
 
     return property_names
 
 
+def _key_value_pair(item: Element) -> tuple[Element, Element]:
+    # The maps in Game.xml always have exactly a Key then a Value
+    key, value = item
+    if key.tag != "Key" or value.tag != "Value":
+        raise ValueError(f"Expected Key and Value elements, got {key.tag} and {value.tag}")
+    return key, value
+
+
 def get_paths(element: Element) -> dict[str, str]:
-    return {
-        key: find_assured(item, "Value").attrib["Path"]
-        for item in element
-        if (key := find_assured(item, "Key").text) is not None
-    }
+    return {key.text: value.attrib["Path"] for key, value in map(_key_value_pair, element) if key.text is not None}
 
 
 def get_key_map(element: Element) -> dict[str, str]:
-    return {
-        key: find_assured(item, "Value").text or ""
-        for item in element
-        if (key := find_assured(item, "Key").text) is not None
-    }
+    return {key.text: value.text or "" for key, value in map(_key_value_pair, element) if key.text is not None}
 
 
 _to_snake_case_re = re.compile(r"(?<!^)(?=[A-Z])")
@@ -386,6 +565,7 @@ _invalid_chars_table = str.maketrans("", "", "()?'")
 _to_underscore_table = str.maketrans("/ ", "__")
 
 
+@functools.cache
 def _filter_property_name(n: str) -> str:
     result = (
         inflection.underscore(n.translate(_to_underscore_table).replace("#", "Number"))
@@ -971,15 +1151,15 @@ class ClassDefinition:
 
 
 def create_all_file(path: Path, prefix: str, modules: list[str]) -> None:
-    code = "# Generated File\n"
+    code = ["# Generated File\n"]
 
     all_list = []
     for name in modules:
-        code += f"from {prefix}{name} import {name}\n"
+        code.append(f"from {prefix}{name} import {name}\n")
         all_list.append(f'    "{name}",')
 
-    code += "\n__all__ = [\n" + "\n".join(all_list) + "\n]\n"
-    path.write_text(code)
+    code.append("\n__all__ = [\n" + "\n".join(all_list) + "\n]\n")
+    path.write_bytes("".join(code).encode("utf-8"))
 
 
 def _add_default_types(core_path: Path, game_id: str) -> None:
@@ -1246,404 +1426,367 @@ class Spline(BaseSpline):
     create_all_file(core_path.joinpath("__init__.py"), base_import, modules)
 
 
-def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
-    logging.info("Parsing templates for game %s: %s", game_id, game_xml)
+class LiteralPropType(typing.NamedTuple):
+    python_type: str
+    struct_format: str
+    default: typing.Any
 
-    base_path = templates_path / game_xml.parent
 
-    t = ElementTree.parse(templates_path / game_xml)
-    root = t.getroot()
+_LITERAL_PROP_TYPES: dict[RawPropType, LiteralPropType] = {
+    "Int": LiteralPropType("int", "l", 0),
+    "UInt": LiteralPropType("int", "L", 0),
+    "Float": LiteralPropType("float", "f", 0.0),
+    "Bool": LiteralPropType("bool", "?", False),
+    "Short": LiteralPropType("int", "h", 0),
+}
 
-    states = get_key_map(find_assured(root, "States"))
-    messages = get_key_map(find_assured(root, "Messages"))
 
-    game_enums: collections.defaultdict[EnumDefinition, list[str]] = collections.defaultdict(list)
-    _enums_by_game[game_id] = game_enums
-
-    if game_id != "Prime":
-        enum_value_repr = repr
-        enum_base = "Enum"
-    else:
-        enum_value_repr = str
-        enum_base = "IntEnum"
+@dataclasses.dataclass
+class _PropDetailsState:
+    """The fields of a PropDetails while get_prop_details is filling them."""
 
-    if states:
-        game_enums[
-            EnumDefinition(
-                "State",
-                frozendict({value: enum_value_repr(key) for key, value in states.items()}),
-                enum_base=enum_base,
-            )
-        ] = []
+    raw_type: RawPropType
+    prop_type: str | None = None
+    json_type: str | None = None
+    need_enums: bool = False
+    comment: str | None = None
+    parse_code: str = "None"
+    build_code: list[str] = dataclasses.field(default_factory=list)
+    from_json_code: str = "None"
+    to_json_code: str = "None"
+    known_size: int | None = None
+    field_params: dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+    needed_imports: dict[str, str | bool] = dataclasses.field(default_factory=dict)
+    format_specifier: str | None = None
+    dependency_code: str | None = None
+    dataclass_metadata: dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+    local_enum: EnumDefinition | None = None
 
-    if messages:
-        game_enums[
-            EnumDefinition(
-                "Message",
-                frozendict({value: enum_value_repr(key) for key, value in messages.items()}),
-                enum_base=enum_base,
-            )
-        ] = []
 
-    script_objects_paths = dict(get_paths(find_assured(root, "ScriptObjects")).items())
-    script_objects = {
-        four_cc: parse_script_object_file(base_path / path, game_id) for four_cc, path in script_objects_paths.items()
-    }
-    property_archetypes = {
-        name: parse_property_archetypes(base_path / path, game_id)
-        for name, path in get_paths(find_assured(root, "PropertyArchetypes")).items()
-    }
+@dataclasses.dataclass(frozen=True)
+class StructCodeGenerator:
+    """
+    Creates the code for the script objects and property archetypes of a game.
+    Holds everything needed from parse_game, so it can be sent to worker processes.
+    """
 
-    code_path = rds_root.joinpath("properties", _game_id_to_file[game_id])
-    _ensure_is_generated_dir(code_path)
-    import_base = f"retro_data_structures.properties.{_game_id_to_file[game_id]}"
-    endianness = get_endianness(game_id)
+    game_id: str
+    import_base: str
+    endianness: str
+    known_enums: dict[str, EnumDefinition]
+    # For each known enum, maps a value to the scrubbed name of the member that has it
+    enum_value_index: dict[str, dict[typing.Any, str]]
+    # Enums not used by exactly one class, which live in the game's enums module
+    shared_enums: frozenset[EnumDefinition]
+
+    def get_prop_details(self, prop: dict) -> PropDetails:
+        details = _PropDetailsState(raw_type=typing.cast("RawPropType", prop["type"]))
+
+        if details.raw_type == "Sound":
+            details.raw_type = "Int"
+            details.field_params["default"] = 65535
+            details.dataclass_metadata["sound"] = True
+            details.dependency_code = "asset_manager.get_audio_group_dependency({obj})"
+
+        handler = _PROP_DETAILS_HANDLERS.get(details.raw_type, StructCodeGenerator._literal_details)
+        handler(self, prop, details)
+
+        if "default" not in details.field_params and "default_factory" not in details.field_params:
+            raise ValueError(f"Unable to find default value for prop {prop}.")
 
-    class LiteralPropType(typing.NamedTuple):
-        python_type: str
-        struct_format: str
-        default: typing.Any
-
-        @property
-        def byte_count(self) -> int:
-            return struct.calcsize(endianness + self.struct_format)
-
-    _literal_prop_types: dict[RawPropType, LiteralPropType] = {
-        "Int": LiteralPropType("int", "l", 0),
-        "UInt": LiteralPropType("int", "L", 0),
-        "Float": LiteralPropType("float", "f", 0.0),
-        "Bool": LiteralPropType("bool", "?", False),
-        "Short": LiteralPropType("int", "h", 0),
-    }
+        if details.prop_type is None:
+            print("what?")
+            print(prop)
+            details.prop_type = ""
 
-    core_path = code_path.joinpath("core")
-    _ensure_is_generated_dir(core_path)
-    _add_default_types(core_path, game_id)
+        if details.json_type is None:
+            details.json_type = details.prop_type
 
-    known_enums: dict[str, EnumDefinition] = {_scrub_enum(e.name): e for e in _enums_by_game[game_id]}
-
-    def get_prop_details(prop: dict) -> PropDetails:
-        raw_type = typing.cast("RawPropType", prop["type"])
-        prop_type = None
-        json_type = None
-        need_enums = False
-        comment = None
-        parse_code = "None"
-        build_code = []
-        from_json_code = "None"
-        to_json_code = "None"
-        known_size = None
-        field_params: dict[str, typing.Any] = {}
-        needed_imports: dict[str, str | bool] = {}
-        format_specifier = None
-        dependency_code = None
-        dataclass_metadata = {}
-        local_enum: EnumDefinition | None = None
-
-        # using repeated == instead of `in` to help with type narrowing
-        if raw_type == "Sound":
-            raw_type = "Int"
-            field_params["default"] = 65535
-            dataclass_metadata["sound"] = True
-            dependency_code = "asset_manager.get_audio_group_dependency({obj})"
-
-        if raw_type == "Struct":
-            archetype_path: str = prop["archetype"]
-            prop_type = archetype_path.split(".")[-1]
-            archetype_imports: set[str] = {prop_type}
-            field_params["default_factory"] = prop_type
-            from_json_code = f"{prop_type}.from_json({{obj}})"
-            to_json_code = "{obj}.to_json()"
-            dependency_code = "{obj}.dependencies_for(asset_manager)"
-            json_type = "json_util.JsonObject"
-
-            default_override = {}
-            for inner_prop in prop["properties"]:
-                if not inner_prop.get("has_default"):
-                    continue
-
-                inner_name = _filter_property_name(
-                    inner_prop["name"] or property_names.get(inner_prop["id"], "unknown")
-                )
+        if details.known_size is None and details.format_specifier is not None:
+            details.known_size = struct.calcsize(self.endianness + details.format_specifier)
 
-                if inner_name == "unknown":
-                    print(f"Ignoring default override for field {inner_prop['id']:08x}: no known name")
-                    continue
-
-                inner_details = get_prop_details(inner_prop)
-                default_override[inner_name] = _get_default(inner_details.dataclass_field_params)
-                needed_imports.update(inner_details.needed_imports)
-                need_enums = need_enums or inner_details.need_enums
-                if inner_details.local_enum is not None:
-                    archetype_imports.add(inner_details.local_enum.name)
-
-            if default_override:
-                override = ", ".join(f"{repr(key)}: {value}" for key, value in default_override.items())
-                parse_code = f"{prop_type}.from_stream(data, property_size, default_override={{{override}}})"
-                build_code.append(f"{{obj}}.to_stream(data, default_override={{{override}}})")
-            else:
-                parse_code = f"{prop_type}.from_stream(data, property_size)"
-                build_code.append("{obj}.to_stream(data)")
+        return PropDetails(
+            prop,
+            details.prop_type,
+            details.json_type,
+            details.need_enums,
+            details.local_enum,
+            details.comment,
+            details.parse_code,
+            details.build_code,
+            details.from_json_code,
+            details.to_json_code,
+            custom_cook_pref=prop["cook_preference"] != "Always",
+            known_size=details.known_size,
+            dataclass_field_params=details.field_params,
+            dataclass_metadata=details.dataclass_metadata,
+            needed_imports=details.needed_imports,
+            format_specifier=details.format_specifier,
+            dependency_code=details.dependency_code,
+        )
 
-            needed_imports[f"{import_base}.archetypes.{archetype_path}"] = ", ".join(sorted(archetype_imports))
+    def _struct_details(self, prop: dict, details: _PropDetailsState) -> None:
+        archetype_path: str = prop["archetype"]
+        details.prop_type = archetype_path.split(".")[-1]
+        archetype_imports: set[str] = {details.prop_type}
+        details.field_params["default_factory"] = details.prop_type
+        details.from_json_code = f"{details.prop_type}.from_json({{obj}})"
+        details.to_json_code = "{obj}.to_json()"
+        details.dependency_code = "{obj}.dependencies_for(asset_manager)"
+        details.json_type = "json_util.JsonObject"
+
+        default_override = {}
+        for inner_prop in prop["properties"]:
+            if not inner_prop.get("has_default"):
+                continue
 
-        elif raw_type == "Choice" or raw_type == "Enum":
-            default_value = prop["default_value"] if prop["has_default"] else 0
-            enum_name = _scrub_enum(prop["archetype"] or prop["name"] or property_names.get(prop["id"]) or "")
-            if enum_name not in known_enums:
-                enum_name += "Enum"
-            format_specifier = "L"
-            json_type = "int"
+            inner_name = _filter_property_name(inner_prop["name"] or property_names.get(inner_prop["id"], "unknown"))
 
-            uses_known_enum = enum_name in known_enums and (
-                default_value in list((enum_def := known_enums[enum_name]).values.values())
-            )
-            if uses_known_enum:
-                if len(_enums_by_game[game_id][enum_def]) != 1:
-                    enum_prefix = "enums."
-                    need_enums = True
-                else:
-                    enum_prefix = ""
-                    local_enum = enum_def
-
-                prop_type = f"{enum_prefix}{enum_name}"
-                parse_code = f"{enum_prefix}{enum_name}.from_stream(data)"
-                build_code.append("{obj}.to_stream(data)")
-                from_json_code = f"{prop_type}.from_json({{obj}})"
-                to_json_code = "{obj}.to_json()"
-
-                for key, value in known_enums[enum_name].values.items():
-                    if value == default_value:
-                        field_params["default"] = f"{enum_prefix}{enum_name}.{_scrub_enum(key)}"
-                assert "default" in field_params
-            else:
-                comment = "Choice"
-                prop_type = "int"
-                field_params["default"] = repr(default_value)
-                parse_code = _CODE_PARSE_UINT32[endianness]
-                build_code.append('data.write(struct.pack("' + endianness + 'L", {obj}))')
-                from_json_code = "{obj}"
-                to_json_code = "{obj}"
-
-        elif raw_type == "Flags":
-            default_value = repr(prop["default_value"] if prop["has_default"] else 0)
-            format_specifier = "L"
-            json_type = "int"
-
-            if "flagset_name" in prop:
-                enum_name = _scrub_enum(prop["flagset_name"])
-                if enum_name not in known_enums:
-                    enum_name += "Flags"
-                enum_def = known_enums[enum_name]
-
-                if len(_enums_by_game[game_id][enum_def]) != 1:
-                    enum_prefix = "enums."
-                    need_enums = True
-                else:
-                    enum_prefix = ""
-                    local_enum = enum_def
-
-                prop_type = enum_prefix + enum_name
-                field_params["default"] = f"{prop_type}({default_value})"
-                parse_code = f"{prop_type}.from_stream(data)"
-                build_code.append("{obj}.to_stream(data)")
-                from_json_code = f"{prop_type}.from_json({{obj}})"
-                to_json_code = "{obj}.to_json()"
-            else:
-                prop_type = "int"
-                comment = "Flagset"
-                field_params["default"] = default_value
-                parse_code = _CODE_PARSE_UINT32[endianness]
-                build_code.append('data.write(struct.pack("' + endianness + 'L", {obj}))')
-                from_json_code = "{obj}"
-                to_json_code = "{obj}"
-
-        elif raw_type == "Asset":
-            prop_type = "AssetId"
-            needed_imports[f"{import_base}.core.AssetId"] = "AssetId, default_asset_id"
-            dataclass_metadata["asset_types"] = prop["type_filter"]
-            if not any(asset_type in prop["type_filter"] for asset_type in ("MLVL", "MREA")):
-                dependency_code = "asset_manager.get_dependencies_for_asset({obj})"
-
-            if "ignore_dependencies_mlvl" in prop:
-                dataclass_metadata["ignore_dependencies_mlvl"] = True
-
-            default_value = "default_asset_id"
-
-            field_params["default"] = default_value
-
-            if game_id in ["PrimeRemastered"]:
-                json_type = "str"
-                needed_imports["uuid"] = True
-                known_size = 16
-                parse_code = "uuid.UUID(bytes_le=data.read(16))"
-                build_code.append("data.write({obj}.bytes_le)")
-                from_json_code = "uuid.UUID({obj})"
-                to_json_code = "str({obj})"
+            if inner_name == "unknown":
+                print(f"Ignoring default override for field {inner_prop['id']:08x}: no known name")
+                continue
 
-            else:
-                json_type = "int"
-                if game_id in ["Prime", "Echoes"]:
-                    format_specifier = "L"
-                    known_size = 4
-                else:
-                    format_specifier = "Q"
-                    known_size = 8
-
-                format_with_prefix = f'"{endianness}{format_specifier}"'
-                parse_code = f"struct.unpack({format_with_prefix}, data.read({known_size}))[0]"
-                build_code.append(f"data.write(struct.pack({format_with_prefix}, {{obj}}))")
-                from_json_code = "{obj}"
-                to_json_code = "{obj}"
-
-        elif raw_type == "AnimationSet" or raw_type == "Spline" or raw_type == "PooledString":
-            if raw_type == "AnimationSet":
-                prop_type = "AnimationParameters"
-                dependency_code = "{obj}.dependencies_for(asset_manager)"
-            else:
-                prop_type = raw_type
-            needed_imports[f"{import_base}.core.{prop_type}"] = prop_type
-            parse_code = f"{prop_type}.from_stream(data, property_size)"
-            build_code.append("{obj}.to_stream(data)")
-            from_json_code = f"{prop_type}.from_json({{obj}})"
-            to_json_code = "{obj}.to_json()"
-            field_params["default_factory"] = prop_type
-            json_type = "json_util.JsonObject"
-
-        elif raw_type == "Array":
-            inner_prop = get_prop_details(prop["item_archetype"])
-
-            prop_type = f"list[{inner_prop.prop_type}]"
-            json_type = f"list[{inner_prop.json_type}]"
-
-            need_enums = inner_prop.need_enums
-            comment = inner_prop.comment
-            field_params["default_factory"] = "list"
-            if len(inner_prop.format_specifier or "") == 1:
-                specifier = f"{repr(endianness)} + {repr(inner_prop.format_specifier)} * (count := {_CODE_PARSE_UINT32[endianness]})"
-                parse_code = f"list(struct.unpack({specifier}, data.read(count * {inner_prop.known_size})))"
-            else:
-                parse_code = f"[{inner_prop.parse_code} for _ in range({_CODE_PARSE_UINT32[endianness]})]"
-            build_code.extend(
-                [
-                    "array = {obj}",
-                    'data.write(struct.pack("' + endianness + 'L", len(array)))',
-                    "for item in array:",
-                    *["    " + inner.format(obj="item") for inner in inner_prop.build_code],
-                ]
+            inner_details = self.get_prop_details(inner_prop)
+            default_override[inner_name] = _get_default(inner_details.dataclass_field_params)
+            details.needed_imports.update(inner_details.needed_imports)
+            details.need_enums = details.need_enums or inner_details.need_enums
+            if inner_details.local_enum is not None:
+                archetype_imports.add(inner_details.local_enum.name)
+
+        if default_override:
+            override = ", ".join(f"{repr(key)}: {value}" for key, value in default_override.items())
+            details.parse_code = (
+                f"{details.prop_type}.from_stream(data, property_size, default_override={{{override}}})"
             )
-            from_json_code = "[{inner} for item in {{obj}}]".format(inner=inner_prop.from_json_code.format(obj="item"))
-            to_json_code = "[{inner} for item in {{obj}}]".format(inner=inner_prop.to_json_code.format(obj="item"))
-            needed_imports.update(inner_prop.needed_imports)
-
-        elif raw_type == "String":
-            prop_type = "str"
-            field_params["default"] = repr(prop["default_value"] if prop["has_default"] else "")
-            null_byte = repr(b"\x00")
-            if game_id == "Prime":
-                # No property size for Prime 1
-                parse_code = f'b"".join(iter(lambda: data.read(1), {null_byte})).decode("utf-8")'
-            else:
-                parse_code = 'data.read(property_size)[:-1].decode("utf-8")'
-            build_code.extend(
-                [
-                    'data.write({obj}.encode("utf-8"))',
-                    f"data.write({null_byte})",
-                ]
-            )
-            from_json_code = "{obj}"
-            to_json_code = "{obj}"
-
-        elif raw_type == "Color" or raw_type == "Vector":
-            prop_type = raw_type
-            needed_imports[f"{import_base}.core.{raw_type}"] = prop_type
-            parse_code = f"{prop_type}.from_stream(data)"
-            build_code.append("{obj}.to_stream(data)")
-            from_json_code = f"{prop_type}.from_json({{obj}})"
-            to_json_code = "{obj}.to_json()"
-            json_type = "json_util.JsonValue"
-
-            if raw_type == "Color":
-                format_specifier = "f" * 4
+            details.build_code.append(f"{{obj}}.to_stream(data, default_override={{{override}}})")
+        else:
+            details.parse_code = f"{details.prop_type}.from_stream(data, property_size)"
+            details.build_code.append("{obj}.to_stream(data)")
+
+        details.needed_imports[f"{self.import_base}.archetypes.{archetype_path}"] = ", ".join(sorted(archetype_imports))
+
+    def _choice_details(self, prop: dict, details: _PropDetailsState) -> None:
+        default_value = prop["default_value"] if prop["has_default"] else 0
+        enum_name = _scrub_enum(prop["archetype"] or prop["name"] or property_names.get(prop["id"]) or "")
+        if enum_name not in self.known_enums:
+            enum_name += "Enum"
+        details.format_specifier = "L"
+        details.json_type = "int"
+
+        default_member = self.enum_value_index.get(enum_name, {}).get(default_value)
+        if default_member is not None:
+            enum_def = self.known_enums[enum_name]
+            if enum_def in self.shared_enums:
+                enum_prefix = "enums."
+                details.need_enums = True
             else:
-                format_specifier = "f" * 3
+                enum_prefix = ""
+                details.local_enum = enum_def
 
-            s = struct.Struct(f"{endianness}f")
+            details.prop_type = f"{enum_prefix}{enum_name}"
+            details.parse_code = f"{enum_prefix}{enum_name}.from_stream(data)"
+            details.build_code.append("{obj}.to_stream(data)")
+            details.from_json_code = f"{details.prop_type}.from_json({{obj}})"
+            details.to_json_code = "{obj}.to_json()"
 
-            if prop["has_default"]:
-                default_value = {k: s.unpack(s.pack(v))[0] for k, v in prop["default_value"].items()}
-                if raw_type == "Color":
-                    value = {"A": 0.0, **default_value}
-                    field_params["default_factory"] = "lambda: Color(r={R}, g={G}, b={B}, a={A})".format(**value)
-                else:
-                    field_params["default_factory"] = "lambda: Vector(x={X}, y={Y}, z={Z})".format(**default_value)
+            details.field_params["default"] = f"{enum_prefix}{enum_name}.{default_member}"
+        else:
+            details.comment = "Choice"
+            details.prop_type = "int"
+            details.field_params["default"] = repr(default_value)
+            details.parse_code = _CODE_PARSE_UINT32[self.endianness]
+            details.build_code.append('data.write(struct.pack("' + self.endianness + 'L", {obj}))')
+            details.from_json_code = "{obj}"
+            details.to_json_code = "{obj}"
+
+    def _flags_details(self, prop: dict, details: _PropDetailsState) -> None:
+        default_value = repr(prop["default_value"] if prop["has_default"] else 0)
+        details.format_specifier = "L"
+        details.json_type = "int"
+
+        if "flagset_name" in prop:
+            enum_name = _scrub_enum(prop["flagset_name"])
+            if enum_name not in self.known_enums:
+                enum_name += "Flags"
+            enum_def = self.known_enums[enum_name]
+
+            if enum_def in self.shared_enums:
+                enum_prefix = "enums."
+                details.need_enums = True
             else:
-                field_params["default_factory"] = prop_type
-
+                enum_prefix = ""
+                details.local_enum = enum_def
+
+            details.prop_type = enum_prefix + enum_name
+            details.field_params["default"] = f"{details.prop_type}({default_value})"
+            details.parse_code = f"{details.prop_type}.from_stream(data)"
+            details.build_code.append("{obj}.to_stream(data)")
+            details.from_json_code = f"{details.prop_type}.from_json({{obj}})"
+            details.to_json_code = "{obj}.to_json()"
         else:
-            # FIXME: Hack for LayerSwitch
-            if prop["name"] == "Area ID" and raw_type == "Int":
-                raw_type = "UInt"
-
-            assert raw_type in _literal_prop_types
-            literal_prop = _literal_prop_types[raw_type]
-            prop_type = literal_prop.python_type
-            struct_format = endianness + literal_prop.struct_format
-            format_specifier = literal_prop.struct_format
-
-            parse_code = f"struct.unpack({repr(struct_format)}, data.read({literal_prop.byte_count}))[0]"
-            build_code.append(f"data.write(struct.pack({repr(struct_format)}, {{obj}}))")
-            from_json_code = "{obj}"
-            to_json_code = "{obj}"
-
-            default_value = prop["default_value"] if prop["has_default"] else literal_prop.default
-            try:
-                s = struct.Struct(struct_format)
-                default_value = s.unpack(s.pack(default_value))[0]
-            except struct.error as e:
-                print(f"{hex(prop['id'])} ({prop['type']}) has invalid default value  {default_value}: {e}")
-                default_value = literal_prop.default
-            field_params["default"] = repr(default_value)
-
-        if "default" not in field_params and "default_factory" not in field_params:
-            raise ValueError(f"Unable to find default value for prop {prop}.")
-
-        if prop_type is None:
-            print("what?")
-            print(prop)
-            prop_type = ""
-
-        if json_type is None:
-            json_type = prop_type
+            details.prop_type = "int"
+            details.comment = "Flagset"
+            details.field_params["default"] = default_value
+            details.parse_code = _CODE_PARSE_UINT32[self.endianness]
+            details.build_code.append('data.write(struct.pack("' + self.endianness + 'L", {obj}))')
+            details.from_json_code = "{obj}"
+            details.to_json_code = "{obj}"
+
+    def _asset_details(self, prop: dict, details: _PropDetailsState) -> None:
+        details.prop_type = "AssetId"
+        details.needed_imports[f"{self.import_base}.core.AssetId"] = "AssetId, default_asset_id"
+        details.dataclass_metadata["asset_types"] = prop["type_filter"]
+        if not any(asset_type in prop["type_filter"] for asset_type in ("MLVL", "MREA")):
+            details.dependency_code = "asset_manager.get_dependencies_for_asset({obj})"
+
+        if "ignore_dependencies_mlvl" in prop:
+            details.dataclass_metadata["ignore_dependencies_mlvl"] = True
+
+        default_value = "default_asset_id"
+
+        details.field_params["default"] = default_value
+
+        if self.game_id in ["PrimeRemastered"]:
+            details.json_type = "str"
+            details.needed_imports["uuid"] = True
+            details.known_size = 16
+            details.parse_code = "uuid.UUID(bytes_le=data.read(16))"
+            details.build_code.append("data.write({obj}.bytes_le)")
+            details.from_json_code = "uuid.UUID({obj})"
+            details.to_json_code = "str({obj})"
 
-        if known_size is None and format_specifier is not None:
-            known_size = struct.calcsize(endianness + format_specifier)
-
-        return PropDetails(
-            prop,
-            prop_type,
-            json_type,
-            need_enums,
-            local_enum,
-            comment,
-            parse_code,
-            build_code,
-            from_json_code,
-            to_json_code,
-            custom_cook_pref=prop["cook_preference"] != "Always",
-            known_size=known_size,
-            dataclass_field_params=field_params,
-            dataclass_metadata=dataclass_metadata,
-            needed_imports=needed_imports,
-            format_specifier=format_specifier,
-            dependency_code=dependency_code,
+        else:
+            details.json_type = "int"
+            if self.game_id in ["Prime", "Echoes"]:
+                details.format_specifier = "L"
+                details.known_size = 4
+            else:
+                details.format_specifier = "Q"
+                details.known_size = 8
+
+            format_with_prefix = f'"{self.endianness}{details.format_specifier}"'
+            details.parse_code = f"struct.unpack({format_with_prefix}, data.read({details.known_size}))[0]"
+            details.build_code.append(f"data.write(struct.pack({format_with_prefix}, {{obj}}))")
+            details.from_json_code = "{obj}"
+            details.to_json_code = "{obj}"
+
+    def _core_type_details(self, prop: dict, details: _PropDetailsState) -> None:
+        if details.raw_type == "AnimationSet":
+            details.prop_type = "AnimationParameters"
+            details.dependency_code = "{obj}.dependencies_for(asset_manager)"
+        else:
+            details.prop_type = details.raw_type
+        details.needed_imports[f"{self.import_base}.core.{details.prop_type}"] = details.prop_type
+        details.parse_code = f"{details.prop_type}.from_stream(data, property_size)"
+        details.build_code.append("{obj}.to_stream(data)")
+        details.from_json_code = f"{details.prop_type}.from_json({{obj}})"
+        details.to_json_code = "{obj}.to_json()"
+        details.field_params["default_factory"] = details.prop_type
+        details.json_type = "json_util.JsonObject"
+
+    def _array_details(self, prop: dict, details: _PropDetailsState) -> None:
+        inner_prop = self.get_prop_details(prop["item_archetype"])
+
+        details.prop_type = f"list[{inner_prop.prop_type}]"
+        details.json_type = f"list[{inner_prop.json_type}]"
+
+        details.need_enums = inner_prop.need_enums
+        details.comment = inner_prop.comment
+        details.field_params["default_factory"] = "list"
+        if len(inner_prop.format_specifier or "") == 1:
+            specifier = f"{repr(self.endianness)} + {repr(inner_prop.format_specifier)} * (count := {_CODE_PARSE_UINT32[self.endianness]})"
+            details.parse_code = f"list(struct.unpack({specifier}, data.read(count * {inner_prop.known_size})))"
+        else:
+            details.parse_code = f"[{inner_prop.parse_code} for _ in range({_CODE_PARSE_UINT32[self.endianness]})]"
+        details.build_code.extend(
+            [
+                "array = {obj}",
+                'data.write(struct.pack("' + self.endianness + 'L", len(array)))',
+                "for item in array:",
+                *["    " + inner.format(obj="item") for inner in inner_prop.build_code],
+            ]
+        )
+        details.from_json_code = "[{inner} for item in {{obj}}]".format(
+            inner=inner_prop.from_json_code.format(obj="item")
         )
+        details.to_json_code = "[{inner} for item in {{obj}}]".format(inner=inner_prop.to_json_code.format(obj="item"))
+        details.needed_imports.update(inner_prop.needed_imports)
+
+    def _string_details(self, prop: dict, details: _PropDetailsState) -> None:
+        details.prop_type = "str"
+        details.field_params["default"] = repr(prop["default_value"] if prop["has_default"] else "")
+        null_byte = repr(b"\x00")
+        if self.game_id == "Prime":
+            # No property size for Prime 1
+            details.parse_code = f'b"".join(iter(lambda: data.read(1), {null_byte})).decode("utf-8")'
+        else:
+            details.parse_code = 'data.read(property_size)[:-1].decode("utf-8")'
+        details.build_code.extend(
+            [
+                'data.write({obj}.encode("utf-8"))',
+                f"data.write({null_byte})",
+            ]
+        )
+        details.from_json_code = "{obj}"
+        details.to_json_code = "{obj}"
+
+    def _color_vector_details(self, prop: dict, details: _PropDetailsState) -> None:
+        details.prop_type = details.raw_type
+        details.needed_imports[f"{self.import_base}.core.{details.raw_type}"] = details.prop_type
+        details.parse_code = f"{details.prop_type}.from_stream(data)"
+        details.build_code.append("{obj}.to_stream(data)")
+        details.from_json_code = f"{details.prop_type}.from_json({{obj}})"
+        details.to_json_code = "{obj}.to_json()"
+        details.json_type = "json_util.JsonValue"
+
+        if details.raw_type == "Color":
+            details.format_specifier = "f" * 4
+        else:
+            details.format_specifier = "f" * 3
 
-    def parse_struct(name: str, this: dict, output_path: Path, struct_fourcc: str | None = None) -> bool:
-        is_struct = struct_fourcc is not None and game_id != "PrimeRemastered"
+        s = struct.Struct(f"{self.endianness}f")
+
+        if prop["has_default"]:
+            default_value = {k: s.unpack(s.pack(v))[0] for k, v in prop["default_value"].items()}
+            if details.raw_type == "Color":
+                value = {"A": 0.0, **default_value}
+                details.field_params["default_factory"] = "lambda: Color(r={R}, g={G}, b={B}, a={A})".format(**value)
+            else:
+                details.field_params["default_factory"] = "lambda: Vector(x={X}, y={Y}, z={Z})".format(**default_value)
+        else:
+            details.field_params["default_factory"] = details.prop_type
+
+    def _literal_details(self, prop: dict, details: _PropDetailsState) -> None:
+        # FIXME: Hack for LayerSwitch
+        if prop["name"] == "Area ID" and details.raw_type == "Int":
+            details.raw_type = "UInt"
+
+        assert details.raw_type in _LITERAL_PROP_TYPES
+        literal_prop = _LITERAL_PROP_TYPES[details.raw_type]
+        details.prop_type = literal_prop.python_type
+        struct_format = self.endianness + literal_prop.struct_format
+        details.format_specifier = literal_prop.struct_format
+
+        details.parse_code = f"struct.unpack({repr(struct_format)}, data.read({struct.calcsize(struct_format)}))[0]"
+        details.build_code.append(f"data.write(struct.pack({repr(struct_format)}, {{obj}}))")
+        details.from_json_code = "{obj}"
+        details.to_json_code = "{obj}"
+
+        default_value = prop["default_value"] if prop["has_default"] else literal_prop.default
+        try:
+            s = struct.Struct(struct_format)
+            default_value = s.unpack(s.pack(default_value))[0]
+        except struct.error as e:
+            print(f"{hex(prop['id'])} ({prop['type']}) has invalid default value  {default_value}: {e}")
+            default_value = literal_prop.default
+        details.field_params["default"] = repr(default_value)
+
+    def create_struct_code(self, name: str, this: dict, struct_fourcc: str | None = None) -> tuple[str, str] | None:
+        """Returns the class path and the code for the module of the given struct, or None if it's not a struct."""
+        is_struct = struct_fourcc is not None and self.game_id != "PrimeRemastered"
         if this["type"] != "Struct":
             print("Ignoring {}. Is a {}".format(name, this["type"]))
-            return False
+            return None
 
         all_names = [
             _filter_property_name(prop["name"] or property_names.get(prop["id"]) or "unnamed")
@@ -1651,7 +1794,7 @@ def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
         ]
 
         cls = ClassDefinition(
-            game_id=game_id,
+            game_id=self.game_id,
             raw_name=name,
             raw_def=this,
             class_name=name,
@@ -1661,28 +1804,30 @@ def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
         )
         base_class = "BaseObjectType" if is_struct else "BaseProperty"
         cls.class_code = f"@dataclasses.dataclass()\nclass {cls.class_name}({base_class}):\n"
-        _fix_module_name(output_path, cls.class_path)
 
         if "modules" in this:
             cls.modules.extend(this["modules"])
 
+        name_counts = collections.Counter(all_names)
         for prop, prop_name in zip(this["properties"], all_names):
             final_prop_name = prop_name
-            if all_names.count(prop_name) > 1:
+            if name_counts[prop_name] > 1:
                 final_prop_name += "_0x{:08x}".format(prop["id"])
 
             cls.add_prop(
-                get_prop_details(prop), final_prop_name, prop["name"] or property_names.get(prop["id"], str(prop["id"]))
+                self.get_prop_details(prop),
+                final_prop_name,
+                prop["name"] or property_names.get(prop["id"], str(prop["id"])),
             )
         cls.finalize_props()
 
         cls.class_code += "\n    @classmethod\n"
         cls.class_code += "    def game(cls) -> Game:\n"
-        cls.class_code += f"        return Game.{_game_id_to_enum[game_id]}\n"
+        cls.class_code += f"        return Game.{_game_id_to_enum[self.game_id]}\n"
 
         if is_struct:
             cls.class_code += "\n    def get_name(self) -> str | None:\n"
-            if game_id == "Prime":
+            if self.game_id == "Prime":
                 if "name" in cls.all_props:
                     name_field = "self.name"
                 else:
@@ -1701,7 +1846,7 @@ def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
                 cls.class_code += f"        {name_field} = name\n"
 
             cls.class_code += "\n    @classmethod\n"
-            if game_id in ["Prime", "PrimeRemastered"]:
+            if self.game_id in ["Prime", "PrimeRemastered"]:
                 cls.class_code += "    def object_type(cls) -> int:\n"
                 cls.class_code += f"        return {struct_fourcc}\n"
             else:
@@ -1725,62 +1870,191 @@ def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
 
         cls.write_dependencies()
 
-        code_code = "# Generated File\n"
-        code_code += "from __future__ import annotations\n\n"
-        code_code += "import dataclasses\n"
+        code_code: list[str] = [
+            "# Generated File\n",
+            "from __future__ import annotations\n\n",
+            "import dataclasses\n",
+        ]
         if cls.local_enums:
-            code_code += "import enum\n"
-        code_code += "import struct\nimport typing\nimport typing_extensions\n"
+            code_code.append("import enum\n")
+        code_code.append("import struct\nimport typing\nimport typing_extensions\n")
 
-        code_code += "\nfrom retro_data_structures import json_util\n"
-        code_code += "from retro_data_structures.game_check import Game\n"
-        code_code += f"from retro_data_structures.properties.base_property import {base_class}\n"
-        code_code += "from retro_data_structures.properties.field_reflection import FieldReflection\n"
+        code_code.append("\nfrom retro_data_structures import json_util\n")
+        code_code.append("from retro_data_structures.game_check import Game\n")
+        code_code.append(f"from retro_data_structures.properties.base_property import {base_class}\n")
+        code_code.append("from retro_data_structures.properties.field_reflection import FieldReflection\n")
 
         if cls.need_enums:
-            code_code += f"import retro_data_structures.enums.{_game_id_to_file[game_id]} as enums\n"
+            code_code.append(f"import retro_data_structures.enums.{_game_id_to_file[self.game_id]} as enums\n")
 
         for import_path, code_import in sorted(cls.needed_imports.items()):
             if code_import is True:
-                code_code += f"import {import_path}\n"
+                code_code.append(f"import {import_path}\n")
             else:
-                code_code += f"from {import_path} import {code_import}\n"
+                code_code.append(f"from {import_path} import {code_import}\n")
 
         typing_imports = {k: v for k, v in cls.typing_imports.items() if k not in cls.needed_imports}
         if typing_imports or cls.type_checking_code:
-            code_code += "\nif typing.TYPE_CHECKING:\n"
+            code_code.append("\nif typing.TYPE_CHECKING:\n")
             for import_path, code_import in sorted(cls.typing_imports.items()):
                 if code_import is True:
-                    code_code += f"    import {import_path}\n"
+                    code_code.append(f"    import {import_path}\n")
                 else:
-                    code_code += f"    from {import_path} import {code_import}\n"
+                    code_code.append(f"    from {import_path} import {code_import}\n")
 
             if typing_imports:
-                code_code += "\n"
+                code_code.append("\n")
 
-            code_code += "\n".join(f"    {line}" for line in cls.type_checking_code)
+            code_code.append("\n".join(f"    {line}" for line in cls.type_checking_code))
 
         for e in cls.local_enums:
-            code_code += e.get_code(game_id)
+            code_code.append(e.get_code(self.game_id))
 
         if cls.before_class_code:
-            code_code += "\n\n"
-            code_code += cls.before_class_code
-        code_code += "\n\n"
-        code_code += cls.class_code
+            code_code.append("\n\n")
+            code_code.append(cls.before_class_code)
+        code_code.append("\n\n")
+        code_code.append(cls.class_code)
         if cls.after_class_code:
-            code_code += "\n\n"
-            code_code += cls.after_class_code
-        final_path = output_path.joinpath(cls.class_path).with_suffix(".py")
-        final_path.parent.mkdir(parents=True, exist_ok=True)
+            code_code.append("\n\n")
+            code_code.append(cls.after_class_code)
+        return cls.class_path, "".join(code_code)
+
+
+# Creates the details of a property, by type. Any other type is a literal.
+_PROP_DETAILS_HANDLERS: dict[str, typing.Callable[[StructCodeGenerator, dict, _PropDetailsState], None]] = {
+    "Struct": StructCodeGenerator._struct_details,
+    "Choice": StructCodeGenerator._choice_details,
+    "Enum": StructCodeGenerator._choice_details,
+    "Flags": StructCodeGenerator._flags_details,
+    "Asset": StructCodeGenerator._asset_details,
+    "AnimationSet": StructCodeGenerator._core_type_details,
+    "Spline": StructCodeGenerator._core_type_details,
+    "PooledString": StructCodeGenerator._core_type_details,
+    "Array": StructCodeGenerator._array_details,
+    "String": StructCodeGenerator._string_details,
+    "Color": StructCodeGenerator._color_vector_details,
+    "Vector": StructCodeGenerator._color_vector_details,
+}
+
+
+def write_struct_code(output_path: Path, class_path: str, code: str) -> None:
+    _fix_module_name(output_path, class_path)
 
-        # There's already a module with same name as this class. Place it as the __init__.py inside
-        if final_path.with_suffix("").is_dir():
-            final_path = final_path.with_suffix("").joinpath("__init__.py")
+    final_path = output_path.joinpath(class_path).with_suffix(".py")
+    final_path.parent.mkdir(parents=True, exist_ok=True)
 
-        _ensure_is_generated_dir(final_path.parent)
-        final_path.write_text(code_code)
-        return True
+    # There's already a module with same name as this class. Place it as the __init__.py inside
+    if final_path.with_suffix("").is_dir():
+        final_path = final_path.with_suffix("").joinpath("__init__.py")
+
+    _ensure_is_generated_dir(final_path.parent)
+    final_path.write_bytes(code.encode("utf-8"))
+
+
+def create_struct_codes(
+    generator: StructCodeGenerator, jobs: list[tuple[str, dict, str | None]]
+) -> list[tuple[str, str] | None]:
+    """
+    Creates the code for all the given structs, using a process pool when there's more than one core available.
+    The files are written by the caller, in order, as nested modules might need to move an already written file.
+    """
+    names = [name for name, _, _ in jobs]
+    structs = [this for _, this, _ in jobs]
+    four_ccs = [struct_fourcc for _, _, struct_fourcc in jobs]
+
+    workers = os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_template_worker, initargs=(property_names,)) as executor:
+            return list(
+                executor.map(generator.create_struct_code, names, structs, four_ccs, chunksize=len(jobs) // workers + 1)
+            )
+
+    return list(map(generator.create_struct_code, names, structs, four_ccs))
+
+
+def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
+    logging.info("Parsing templates for game %s: %s", game_id, game_xml)
+
+    base_path = templates_path / game_xml.parent
+
+    root = parse_xml(templates_path / game_xml)
+
+    states = get_key_map(find_assured(root, "States"))
+    messages = get_key_map(find_assured(root, "Messages"))
+
+    game_enums: collections.defaultdict[EnumDefinition, list[str]] = collections.defaultdict(list)
+    _enums_by_game[game_id] = game_enums
+    _known_enums_by_game[game_id] = {}
+
+    if game_id != "Prime":
+        enum_value_repr = repr
+        enum_base = "Enum"
+    else:
+        enum_value_repr = str
+        enum_base = "IntEnum"
+
+    if states:
+        _register_enum(
+            game_id,
+            EnumDefinition(
+                "State",
+                frozendict({value: enum_value_repr(key) for key, value in states.items()}),
+                enum_base=enum_base,
+            ),
+        )
+
+    if messages:
+        _register_enum(
+            game_id,
+            EnumDefinition(
+                "Message",
+                frozendict({value: enum_value_repr(key) for key, value in messages.items()}),
+                enum_base=enum_base,
+            ),
+        )
+
+    script_objects_paths = get_paths(find_assured(root, "ScriptObjects"))
+    property_archetypes_paths = get_paths(find_assured(root, "PropertyArchetypes"))
+    parsed_templates = parse_template_files(
+        [(parse_script_object_file, base_path / path) for path in script_objects_paths.values()]
+        + [(parse_property_archetypes, base_path / path) for path in property_archetypes_paths.values()],
+        game_id,
+    )
+    script_objects = dict(zip(script_objects_paths, parsed_templates[: len(script_objects_paths)]))
+    property_archetypes = dict(zip(property_archetypes_paths, parsed_templates[len(script_objects_paths) :]))
+
+    code_path = rds_root.joinpath("properties", _game_id_to_file[game_id])
+    _ensure_is_generated_dir(code_path)
+
+    core_path = code_path.joinpath("core")
+    _ensure_is_generated_dir(core_path)
+    _add_default_types(core_path, game_id)
+
+    known_enums = _known_enums_by_game[game_id]
+    generator = StructCodeGenerator(
+        game_id=game_id,
+        import_base=f"retro_data_structures.properties.{_game_id_to_file[game_id]}",
+        endianness=get_endianness(game_id),
+        known_enums=known_enums,
+        enum_value_index={
+            enum_name: {value: _scrub_enum(key) for key, value in e.values.items()}
+            for enum_name, e in known_enums.items()
+        },
+        shared_enums=frozenset(e for e, uses in game_enums.items() if len(uses) != 1),
+    )
+
+    object_stems = {object_fourcc: Path(script_objects_paths[object_fourcc]).stem for object_fourcc in script_objects}
+    struct_codes = create_struct_codes(
+        generator,
+        [
+            (object_stems[object_fourcc], script_object, object_fourcc)
+            for object_fourcc, script_object in script_objects.items()
+        ]
+        + [(archetype_name, archetype, None) for archetype_name, archetype in property_archetypes.items()],
+    )
+    object_codes = struct_codes[: len(script_objects)]
+    archetype_codes = struct_codes[len(script_objects) :]
 
     path = code_path.joinpath("objects")
     _ensure_is_generated_dir(path)
@@ -1803,26 +2077,29 @@ def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
     else:
         object_type = "BaseObjectType"
 
-    getter_func = "# Generated File\n"
-    getter_func += "import functools\nimport typing\n\n"
-    getter_func += f"from retro_data_structures.properties.base_property import {object_type}\n"
+    getter_func = [
+        "# Generated File\n",
+        "import functools\nimport typing\n\n",
+        f"from retro_data_structures.properties.base_property import {object_type}\n",
+    ]
 
     base_import_path = f"retro_data_structures.properties.{_game_id_to_file[game_id]}.objects."
-    fourcc_mapping = f"\n_FOUR_CC_MAPPING: dict[{four_cc_type}, typing.Type[{object_type}]] = {{\n"
-    for object_fourcc, script_object in script_objects.items():
-        stem = Path(script_objects_paths[object_fourcc]).stem
-        parse_struct(stem, script_object, path, struct_fourcc=object_fourcc)
+    fourcc_mapping = [f"\n_FOUR_CC_MAPPING: dict[{four_cc_type}, typing.Type[{object_type}]] = {{\n"]
+    for object_fourcc, struct_code in zip(script_objects, object_codes):
+        stem = object_stems[object_fourcc]
+        if struct_code is not None:
+            write_struct_code(path, *struct_code)
 
-        getter_func += f"from {base_import_path}{stem} import {stem}\n"
-        fourcc_mapping += f"    {four_cc_wrap(object_fourcc)}: {stem},\n"
+        getter_func.append(f"from {base_import_path}{stem} import {stem}\n")
+        fourcc_mapping.append(f"    {four_cc_wrap(object_fourcc)}: {stem},\n")
 
-    getter_func += fourcc_mapping
-    getter_func += "}\n\n\n"
+    getter_func.extend(fourcc_mapping)
+    getter_func.append("}\n\n\n")
 
-    getter_func += "@functools.lru_cache(maxsize=None)\n"
-    getter_func += f"def get_object(four_cc: {four_cc_type}) -> typing.Type[{object_type}]:\n"
-    getter_func += "    return _FOUR_CC_MAPPING[four_cc]\n"
-    path.joinpath("__init__.py").write_text(getter_func)
+    getter_func.append("@functools.lru_cache(maxsize=None)\n")
+    getter_func.append(f"def get_object(four_cc: {four_cc_type}) -> typing.Type[{object_type}]:\n")
+    getter_func.append("    return _FOUR_CC_MAPPING[four_cc]\n")
+    path.joinpath("__init__.py").write_bytes("".join(getter_func).encode("utf-8"))
 
     print("> Creating archetypes")
     path = code_path.joinpath("archetypes")
@@ -1831,8 +2108,9 @@ def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
     base_import_path = f"retro_data_structures.properties.{_game_id_to_file[game_id]}.archetypes."
 
     archetype_all = []
-    for archetype_name, archetype in property_archetypes.items():
-        if parse_struct(archetype_name, archetype, path, struct_fourcc=None):
+    for archetype_name, struct_code in zip(property_archetypes, archetype_codes):
+        if struct_code is not None:
+            write_struct_code(path, *struct_code)
             archetype_all.append(archetype_name)
 
     create_all_file(path.joinpath("__init__.py"), base_import_path, archetype_all)
@@ -1847,8 +2125,7 @@ def parse_game(templates_path: Path, game_xml: Path, game_id: str) -> dict:
 
 
 def parse_game_list(templates_path: Path) -> dict:
-    t = ElementTree.parse(templates_path / "GameList.xml")
-    root = t.getroot()
+    root = parse_xml(templates_path / "GameList.xml")
     return {
         game.attrib["ID"]: Path(template.text)
         for game in root
@@ -1995,8 +2272,8 @@ def persist_data(parse_result: dict[str, typing.Any]) -> None:
     # First write the enums
     for game_id in parse_result.keys():
         if game_id in _game_id_to_file:
-            rds_root.joinpath("enums", f"{_game_id_to_file[game_id]}.py").write_text(
-                create_enums_file(game_id, _enums_by_game[game_id])
+            rds_root.joinpath("enums", f"{_game_id_to_file[game_id]}.py").write_bytes(
+                create_enums_file(game_id, _enums_by_game[game_id]).encode("utf-8")
             )
 
 
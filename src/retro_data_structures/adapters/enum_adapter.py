@@ -12,9 +12,12 @@ class EnumAdapter(construct.Adapter, typing.Generic[E]):
     def __init__(self, enum_class: type[E], subcon=construct.Int32ub):
         super().__init__(construct.Enum(subcon, enum_class))
         self._enum_class = enum_class
+        # Plain dicts, to skip EnumMeta.__getitem__ and the `name` descriptor for every field
+        self._members: dict[str, E] = dict(enum_class.__members__)
+        self._names: dict[E, str] = {member: member.name for member in enum_class}
 
     def _decode(self, obj: str, context, path) -> E:
-        return self._enum_class[obj]
+        return self._members[obj]
 
     def _encode(self, obj: E, context, path) -> str:
-        return obj.name
+        return self._names[obj]
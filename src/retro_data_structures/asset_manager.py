@@ -4,7 +4,9 @@ import collections
 import fnmatch
 import json
 import logging
+import sys
 import typing
+import uuid
 from collections import defaultdict
 
 from retro_data_structures import formats
@@ -22,7 +24,7 @@ from retro_data_structures.disc.game_disc import GameDisc
 from retro_data_structures.exceptions import DependenciesHandledElsewhere, UnknownAssetId
 from retro_data_structures.formats import Dgrp, dependency_cheating
 from retro_data_structures.formats.audio_group import Agsc, Atbl
-from retro_data_structures.formats.pak import Pak
+from retro_data_structures.formats.pak import Pak, PakResourceLocation
 
 if typing.TYPE_CHECKING:
     from collections.abc import Iterator
@@ -36,6 +38,8 @@ if typing.TYPE_CHECKING:
 T = typing.TypeVar("T", bound=BaseResource)
 logger = logging.getLogger(__name__)
 
+_HEADER_CACHE_VERSION = 1
+
 
 class FileProvider:
     def is_file(self, name: str) -> bool:
@@ -56,6 +60,13 @@ class FileProvider:
     def get_file_list(self) -> list[str]:
         raise NotImplementedError
 
+    def get_file_fingerprint(self, name: str) -> list[int] | None:
+        """
+        A value that changes whenever the given file changes, used to know if cached data about it is still valid.
+        None if it's not possible to know.
+        """
+        return None
+
 
 class PathFileProvider(FileProvider):
     def __init__(self, root: Path):
@@ -88,6 +99,10 @@ class PathFileProvider(FileProvider):
     def get_file_list(self) -> list[str]:
         return list(self.rglob("*"))
 
+    def get_file_fingerprint(self, name: str) -> list[int] | None:
+        stat = self.file_root.joinpath(name).stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
 
 class IsoFileProvider(FileProvider):
     game_disc: GameDisc | None
@@ -97,17 +112,17 @@ class IsoFileProvider(FileProvider):
 
         self.game_disc = GameDisc.parse(iso_path)
         self.all_files = self.game_disc.files()
+        self._all_files_set = frozenset(self.all_files)
 
     def __repr__(self):
         return f"<IsoFileProvider {self.iso_path}>"
 
     def is_file(self, name: str) -> bool:
-        return name in self.all_files
+        return name in self._all_files_set
 
     def rglob(self, pattern: str) -> Iterator[str]:
-        for it in self.all_files:
-            if fnmatch.fnmatch(it, pattern):
-                yield it
+        # fnmatch.filter only translates the pattern once, instead of for every file
+        yield from fnmatch.filter(self.all_files, pattern)
 
     def open_binary(self, name: str):
         return self.game_disc.open_binary(name)
@@ -121,6 +136,23 @@ class IsoFileProvider(FileProvider):
     def get_file_list(self) -> list[str]:
         return list(self.all_files)
 
+    def get_file_fingerprint(self, name: str) -> list[int] | None:
+        # Files inside the ISO only change with the ISO itself
+        stat = self.iso_path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+
+def _encode_asset_id(asset_id: AssetId) -> int | str:
+    if isinstance(asset_id, uuid.UUID):
+        return str(asset_id)
+    return asset_id
+
+
+def _decode_asset_id(asset_id: int | str) -> AssetId:
+    if isinstance(asset_id, str):
+        return uuid.UUID(asset_id)
+    return asset_id
+
 
 class AssetManager:
     """
@@ -128,60 +160,160 @@ class AssetManager:
 
     _files_for_asset_id: mapping of asset id to all paks it can be found at
     _ensured_asset_ids: mapping of pak name to assets we'll copy into it when saving
+    _ensured_paks_for_asset_id: reverse of `_ensured_asset_ids`, mapping of asset id to paks it'll be copied into
     _modified_resources: mapping of asset id to raw resources. When saving, these asset ids are replaced
+    _modified_paks: paks that contain any of the asset ids in `_modified_resources`
+
+    When `header_cache` is given, the asset ids and types of each PAK are saved to that file and used instead of
+    parsing the PAK headers again, for as long as the PAK files don't change.
     """
 
     headers: dict[str, construct.Container]
     _paks_for_asset_id: dict[AssetId, set[str]]
     _types_for_asset_id: dict[AssetId, AssetType]
+    _resource_locations: dict[str, dict[AssetId, PakResourceLocation]]
     _ensured_asset_ids: dict[str, set[AssetId]]
+    _ensured_paks_for_asset_id: defaultdict[AssetId, set[str]]
     _modified_resources: dict[AssetId, RawResource | None]
+    _modified_paks: set[str]
     _in_memory_paks: dict[str, Pak]
     _custom_asset_ids: dict[str, AssetId]
+    _resolved_asset_ids: dict[NameOrAssetId, AssetId]
     _audio_group_dependency: tuple[Dgrp, ...] | None = None
 
     _cached_dependencies: dict[AssetId, tuple[Dependency, ...]]
+    _shared_dependencies: dict[Dependency, Dependency]
+    _types_with_dependencies: dict[AssetType, bool]
     _cached_ancs_per_char_dependencies: defaultdict[AssetId, dict[int, tuple[Dependency, ...]]]
     _sound_id_to_agsc: dict[int, AssetId | None] | None = None
 
-    def __init__(self, provider: FileProvider, target_game: Game):
+    def __init__(self, provider: FileProvider, target_game: Game, header_cache: Path | None = None):
         self.provider = provider
         self.target_game = target_game
+        self.header_cache = header_cache
         self._modified_resources = {}
+        self._modified_paks = set()
         self._in_memory_paks = {}
         self._next_generated_id = 0xFFFF0000
 
         self._update_headers()
 
         self._cached_dependencies = {}
+        self._shared_dependencies = {}
+        self._types_with_dependencies = {}
         self._cached_ancs_per_char_dependencies = defaultdict(dict)
 
     def _resolve_asset_id(self, value: NameOrAssetId) -> AssetId:
-        if str(value) in self._custom_asset_ids:
-            return self._custom_asset_ids[str(value)]
-        return resolve_asset_id(self.target_game, value)
+        try:
+            return self._resolved_asset_ids[value]
+        except KeyError:
+            pass
+
+        result = self._custom_asset_ids.get(str(value))
+        if result is None:
+            result = resolve_asset_id(self.target_game, value)
+
+        self._resolved_asset_ids[value] = result
+        return result
+
+    def _set_custom_asset_id(self, name: str, asset_id: AssetId) -> None:
+        self._custom_asset_ids[name] = asset_id
+        # Any name might now resolve differently
+        self._resolved_asset_ids.clear()
 
     def _update_headers(self):
         self._ensured_asset_ids = {}
+        self._ensured_paks_for_asset_id = collections.defaultdict(set)
         self._paks_for_asset_id = collections.defaultdict(set)
         self._types_for_asset_id = {}
+        self._resource_locations = {}
 
         self._custom_asset_ids = {}
+        self._resolved_asset_ids = {}
         if self.provider.is_file("custom_names.json"):
-            custom_names_text = self.provider.read_binary("custom_names.json").decode("utf-8")
-
-            self._custom_asset_ids.update(dict(json.loads(custom_names_text).items()))
+            self._custom_asset_ids.update(json.loads(self.provider.read_binary("custom_names.json")))
 
         self.all_paks = list(self.provider.rglob("*.pak"))
 
+        cached_paks = self._read_header_cache()
+        new_cached_paks = {}
+
+        fingerprints = {name: self.provider.get_file_fingerprint(name) for name in self.all_paks}
+        try:
+            resources_for_pak = {
+                name: {
+                    _decode_asset_id(asset_id): PakResourceLocation(sys.intern(asset_type), offset, size, compressed)
+                    for asset_id, asset_type, offset, size, compressed in cached["resources"]
+                }
+                for name, fingerprint in fingerprints.items()
+                if fingerprint is not None
+                and (cached := cached_paks.get(name)) is not None
+                and cached["fingerprint"] == fingerprint
+            }
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Ignoring PAK header cache at %s: %s", self.header_cache, e)
+            cached_paks = {}
+            resources_for_pak = {}
+
+        for name in self.all_paks:
+            if name not in resources_for_pak:
+                resources_for_pak[name] = self._read_pak_resources(name)
+
+        paks_for_asset_id = self._paks_for_asset_id
         for name in self.all_paks:
-            with self.provider.open_binary(name) as f:
-                pak_no_data = Pak.header_for_game(self.target_game).parse_stream(f, target_game=self.target_game)
+            fingerprint = fingerprints[name]
+            resources = resources_for_pak[name]
+
+            if fingerprint is not None:
+                new_cached_paks[name] = {
+                    "fingerprint": fingerprint,
+                    "resources": [[_encode_asset_id(asset_id), *location] for asset_id, location in resources.items()],
+                }
 
             self._ensured_asset_ids[name] = set()
-            for entry in pak_no_data.resources:
-                self._paks_for_asset_id[entry.asset_id].add(name)
-                self._types_for_asset_id[entry.asset_id] = entry.asset_type
+            self._resource_locations[name] = resources
+            for asset_id, location in resources.items():
+                paks_for_asset_id[asset_id].add(name)
+                self._types_for_asset_id[asset_id] = location.asset_type
+
+        if new_cached_paks != cached_paks:
+            self._write_header_cache(new_cached_paks)
+
+    def _read_pak_resources(self, name: str) -> dict[AssetId, PakResourceLocation]:
+        with self.provider.open_binary(name) as f:
+            pak_no_data = Pak.header_for_game(self.target_game).parse_stream(f, target_game=self.target_game)
+        return Pak.resource_locations(pak_no_data, self.target_game)
+
+    def _read_header_cache(self) -> dict[str, dict]:
+        if self.header_cache is None or not self.header_cache.is_file():
+            return {}
+
+        try:
+            data = json.loads(self.header_cache.read_text("utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring PAK header cache at %s: %s", self.header_cache, e)
+            return {}
+
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != _HEADER_CACHE_VERSION
+            or data.get("game") != self.target_game.value
+        ):
+            return {}
+
+        return data.get("paks", {})
+
+    def _write_header_cache(self, cached_paks: dict[str, dict]) -> None:
+        if self.header_cache is None:
+            return
+
+        try:
+            self.header_cache.write_text(
+                json.dumps({"version": _HEADER_CACHE_VERSION, "game": self.target_game.value, "paks": cached_paks}),
+                "utf-8",
+            )
+        except OSError as e:
+            logger.warning("Unable to write PAK header cache to %s: %s", self.header_cache, e)
 
     def all_asset_ids(self) -> Iterator[AssetId]:
         """
@@ -201,8 +333,9 @@ class AssetManager:
         """
         Checks if a given asset id exists.
         """
-        asset_id = self._resolve_asset_id(asset_id)
+        return self._does_asset_exists_resolved(self._resolve_asset_id(asset_id))
 
+    def _does_asset_exists_resolved(self, asset_id: AssetId) -> bool:
         if asset_id in self._modified_resources:
             return self._modified_resources[asset_id] is not None
 
@@ -246,6 +379,13 @@ class AssetManager:
 
         try:
             for pak_name in self._paks_for_asset_id[asset_id]:
+                # Read just the asset, unless the entire PAK is already loaded
+                if pak_name not in self._in_memory_paks:
+                    location = self._resource_locations[pak_name].get(asset_id)
+                    if location is not None:
+                        with self.provider.open_binary(pak_name) as f:
+                            return Pak.read_resource(f, location, self.target_game)
+
                 pak = self.get_pak(pak_name)
                 result = pak.get_asset(asset_id)
                 if result is not None:
@@ -288,7 +428,7 @@ class AssetManager:
         if name in self._custom_asset_ids and self._custom_asset_ids[name] != asset_id:
             raise ValueError(f"{name} already exists")
 
-        self._custom_asset_ids[name] = asset_id
+        self._set_custom_asset_id(name, asset_id)
 
     def get_custom_asset(self, name: str) -> AssetId | None:
         return self._custom_asset_ids.get(name)
@@ -300,13 +440,13 @@ class AssetManager:
         """
         asset_id = self._resolve_asset_id(name)
 
-        if self.does_asset_exists(asset_id):
+        if self._does_asset_exists_resolved(asset_id):
             raise ValueError(f"{name} already exists")
 
         in_paks = list(in_paks)
         files_set = set()
 
-        self._custom_asset_ids[str(name)] = asset_id
+        self._set_custom_asset_id(str(name), asset_id)
         self._paks_for_asset_id[asset_id] = files_set
         self.replace_asset(name, new_data)
         for pak_name in in_paks:
@@ -330,7 +470,7 @@ class AssetManager:
         asset_id = self._resolve_asset_id(asset_id)
 
         # Test if the asset exists
-        if not self.does_asset_exists(asset_id):
+        if not self._does_asset_exists_resolved(asset_id):
             raise UnknownAssetId(asset_id, original_name)
 
         if isinstance(new_data, BaseResource):
@@ -344,6 +484,7 @@ class AssetManager:
             raw_asset = new_data
 
         self._modified_resources[asset_id] = raw_asset
+        self._modified_paks.update(self._paks_for_asset_id[asset_id])
 
         return asset_id
 
@@ -359,15 +500,15 @@ class AssetManager:
         asset_id = self._resolve_asset_id(asset_id)
 
         # Test if the asset exists
-        if not self.does_asset_exists(asset_id):
+        if not self._does_asset_exists_resolved(asset_id):
             raise UnknownAssetId(asset_id, original_name)
 
         self._modified_resources[asset_id] = None
+        self._modified_paks.update(self._paks_for_asset_id[asset_id])
 
         # If this asset id was previously ensured, remove that
-        for ensured_ids in self._ensured_asset_ids.values():
-            if asset_id in ensured_ids:
-                ensured_ids.remove(asset_id)
+        for pak_name in self._ensured_paks_for_asset_id.pop(asset_id, ()):
+            self._ensured_asset_ids[pak_name].discard(asset_id)
 
     def ensure_present(self, pak_name: str, asset_id: NameOrAssetId):
         """
@@ -380,12 +521,13 @@ class AssetManager:
         asset_id = self._resolve_asset_id(asset_id)
 
         # Test if the asset exists
-        if not self.does_asset_exists(asset_id):
+        if not self._does_asset_exists_resolved(asset_id):
             raise UnknownAssetId(asset_id, original_name)
 
         # If the pak already has the given asset, do nothing
         if pak_name not in self._paks_for_asset_id[asset_id]:
             self._ensured_asset_ids[pak_name].add(asset_id)
+            self._ensured_paks_for_asset_id[asset_id].add(pak_name)
 
     def get_pak(self, pak_name: str) -> Pak:
         if pak_name not in self._ensured_asset_ids:
@@ -398,6 +540,15 @@ class AssetManager:
 
         return self._in_memory_paks[pak_name]
 
+    def _type_has_dependencies(self, asset_type: AssetType) -> bool:
+        # Only depends on the type, so check it once per type instead of for every asset
+        try:
+            return self._types_with_dependencies[asset_type]
+        except KeyError:
+            result = formats.resource_type_for(asset_type).has_dependencies(self.target_game)
+            self._types_with_dependencies[asset_type] = result
+            return result
+
     def _get_dependencies_for_asset(
         self,
         asset_id: NameOrAssetId,
@@ -406,12 +557,13 @@ class AssetManager:
         if not self.target_game.is_valid_asset_id(asset_id):
             return
 
-        if not self.does_asset_exists(asset_id):
+        resolved_id = self._resolve_asset_id(asset_id)
+        if not self._does_asset_exists_resolved(resolved_id):
             if must_exist:
                 raise UnknownAssetId(asset_id)
             return
 
-        asset_type = self.get_asset_type(asset_id)
+        asset_type = self.get_asset_type(resolved_id)
 
         dep_cache = self._cached_dependencies
         deps: tuple[Dependency, ...] = ()
@@ -424,13 +576,17 @@ class AssetManager:
                 deps = tuple(dependency_cheating.get_cheated_dependencies(self.get_raw_asset(asset_id), self))
 
             elif formats.has_resource_type(asset_type):
-                if self.get_asset_format(asset_id).has_dependencies(self.target_game):
+                if self._type_has_dependencies(asset_type):
                     deps = tuple(self.get_parsed_asset(asset_id).dependencies_for())
                 deps += tuple(self.target_game.special_ancs_dependencies(asset_id))
 
             else:
                 logger.warning(f"Potential missing assets for {asset_type} {asset_id}")
 
+            # Many assets depend on the same assets, so keep a single copy of each equal Dependency in the cache
+            share = self._shared_dependencies.setdefault
+            deps = tuple(share(dep, dep) for dep in deps)
+
             # logger.debug(f"Adding {asset_id:#8x} deps to cache...")
             dep_cache[asset_id] = deps
 
@@ -443,8 +599,11 @@ class AssetManager:
             deps = self._get_dependencies_for_asset(asset_id, must_exist)
         except DependenciesHandledElsewhere:
             return
-        for it in deps:
-            yield Dependency(it.type, it.id, it.exclude_for_mlvl or override)
+        if override:
+            for it in deps:
+                yield Dependency(it.type, it.id, True)
+        else:
+            yield from deps
 
     def get_dependencies_for_ancs(self, asset_id: NameOrAssetId, char_index: int | None = None):
         if not self.target_game.is_valid_asset_id(asset_id):
@@ -487,15 +646,16 @@ class AssetManager:
         for agsc_id in agsc_ids:
             try:
                 agsc = self.get_parsed_asset(agsc_id, type_hint=Agsc)
-                for define_id in agsc.define_ids:
-                    define_id_to_agsc[define_id] = agsc_id
+                define_id_to_agsc.update(dict.fromkeys(agsc.define_ids, agsc_id))
             except Exception as e:
                 raise Exception(f"Error parsing AGSC {hex(agsc_id)}: {e}")
 
         self._sound_id_to_agsc = {-1: None}
-        for sound_id, define_id in enumerate(atbl.raw):
-            if define_id in define_id_to_agsc:
-                self._sound_id_to_agsc[sound_id] = define_id_to_agsc[define_id]
+        self._sound_id_to_agsc.update(
+            (sound_id, define_id_to_agsc[define_id])
+            for sound_id, define_id in enumerate(atbl.raw)
+            if define_id in define_id_to_agsc
+        )
 
     def get_audio_group_dependency(self, sound_id: int) -> Iterator[Dependency]:
         if self._sound_id_to_agsc is None:
@@ -518,20 +678,38 @@ class AssetManager:
 
     def _write_custom_names(self, output_path: Path):
         custom_names = output_path.joinpath("custom_names.json")
-        with custom_names.open("w") as f:
-            json.dump(
-                dict(self._custom_asset_ids.items()),
-                f,
-                indent=4,
-            )
+        custom_names.write_text(json.dumps(self._custom_asset_ids, indent=4))
+
+    def _write_modified_pak(
+        self, pak_name: str, asset_ids_to_copy: dict[AssetId, RawResource], output_path: Path
+    ) -> None:
+        logger.info("Updating %s", pak_name)
+        # Nothing else references the pak after this, so it's freed as soon as it's written
+        pak = self._in_memory_paks.pop(pak_name)
+
+        for asset_id, raw_asset in self._modified_resources.items():
+            if pak_name in self._paks_for_asset_id[asset_id]:
+                if raw_asset is None:
+                    pak.remove_asset(asset_id)
+                else:
+                    pak.replace_asset(asset_id, raw_asset)
+
+        # Add the files that were ensured to be present in this pak
+        for asset_id in self._ensured_asset_ids[pak_name]:
+            pak.add_asset(asset_id, asset_ids_to_copy[asset_id])
+
+        # Write the data
+        out_pak_path = output_path.joinpath(pak_name)
+        logger.info("Writing %s", out_pak_path)
+        out_pak_path.parent.mkdir(parents=True, exist_ok=True)
+        # PAKs are written with many small writes, so use a larger buffer than the default
+        with out_pak_path.open("w+b", buffering=1024 * 1024) as f:
+            pak.build_stream(f)
 
     def save_modifications(self, output_path: Path):
-        modified_paks = set()
+        modified_paks = self._modified_paks
         asset_ids_to_copy = {}
 
-        for asset_id in self._modified_resources.keys():
-            modified_paks.update(self._paks_for_asset_id[asset_id])
-
         # Make sure all paks were loaded
         for pak_name in modified_paks:
             self.get_pak(pak_name)
@@ -544,27 +722,9 @@ class AssetManager:
 
         # Update the PAKs
         for pak_name in modified_paks:
-            logger.info("Updating %s", pak_name)
-            pak = self._in_memory_paks.pop(pak_name)
-
-            for asset_id, raw_asset in self._modified_resources.items():
-                if pak_name in self._paks_for_asset_id[asset_id]:
-                    if raw_asset is None:
-                        pak.remove_asset(asset_id)
-                    else:
-                        pak.replace_asset(asset_id, raw_asset)
-
-            # Add the files that were ensured to be present in this pak
-            for asset_id in self._ensured_asset_ids[pak_name]:
-                pak.add_asset(asset_id, asset_ids_to_copy[asset_id])
-
-            # Write the data
-            out_pak_path = output_path.joinpath(pak_name)
-            logger.info("Writing %s", out_pak_path)
-            out_pak_path.parent.mkdir(parents=True, exist_ok=True)
-            with out_pak_path.open("w+b") as f:
-                pak.build_stream(f)
+            self._write_modified_pak(pak_name, asset_ids_to_copy, output_path)
 
         self._write_custom_names(output_path)
         self._modified_resources = {}
+        self._modified_paks = set()
         self._update_headers()
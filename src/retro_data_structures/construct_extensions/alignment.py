@@ -15,17 +15,15 @@ class AlignTo(Construct):
 
     def _parse(self, stream, context, path):
         modulus = construct.evaluate(self.modulus, context)
-        position = stream_tell(stream, path)
-        pad = modulus - (position % modulus)
-        if pad < modulus:
+        pad = -stream_tell(stream, path) % modulus
+        if pad:
             return construct.stream_read(stream, pad, path)
         return b""
 
     def _build(self, obj, stream, context, path):
         modulus = construct.evaluate(self.modulus, context)
-        position = stream_tell(stream, path)
-        pad = modulus - (position % modulus)
-        if pad < modulus:
+        pad = -stream_tell(stream, path) % modulus
+        if pad:
             construct.stream_write(stream, self.pattern * pad, pad, path)
 
 
@@ -39,7 +37,7 @@ class AlignedPrefixed(Subconstruct):
 
     def _parse(self, stream, context, path):
         modulus = construct.evaluate(self.modulus, context)
-        length_size = construct.evaluate(self.modulus, context)
+        length_size = construct.evaluate(self.length_size, context)
 
         length = self.length_field._parsereport(stream, context, path)
         data = construct.stream_read(stream, length, path)
@@ -55,7 +53,7 @@ class AlignedPrefixed(Subconstruct):
 
     def _build(self, obj, stream, context, path):
         modulus = construct.evaluate(self.modulus, context)
-        length_size = construct.evaluate(self.modulus, context)
+        length_size = construct.evaluate(self.length_size, context)
 
         stream2 = io.BytesIO()
         buildret = self.subcon._build(obj, stream2, context, path)
@@ -5,8 +5,14 @@ from typing import Any
 from construct import EnumIntegerString
 from construct.lib import Container, ListContainer
 
+# Values of exactly these types are returned as they are, without going through the checks below
+_PLAIN_TYPES = frozenset([int, float, str, bytes, bool, type(None)])
+
 
 def convert_to_raw_python(value) -> Any:
+    if type(value) in _PLAIN_TYPES:
+        return value
+
     if callable(value):
         value = value()
 
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import itertools
+import struct
 
 import construct
-from construct import Const, Construct, FocusedSeq, Optional, Rebuild, len_, stream_tell, this
+from construct import Construct, FocusedSeq, Rebuild, len_, stream_tell, this
 
 
 def PrefixedArrayWithExtra(countfield, extrafield, subcon):
@@ -53,6 +54,22 @@ def PrefixedArrayWithExtra(countfield, extrafield, subcon):
     return macro
 
 
+# The bits of each byte, from least significant to most significant
+_BYTE_TO_LSB_FIRST_BITS = [bytes((value >> i) & 1 for i in range(8)) for value in range(256)]
+_BITS_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def _decode_32_bits(data: bytes) -> bytes:
+    # Same as `bytes(reversed(construct.bytes2bits(data)))`
+    bits = _BYTE_TO_LSB_FIRST_BITS
+    return bits[data[3]] + bits[data[2]] + bits[data[1]] + bits[data[0]]
+
+
+def _encode_32_bits(data: bytes) -> bytes:
+    # Same as `construct.bits2bytes(bytes(reversed(data)))`
+    return int(data[::-1].translate(_BITS_TO_DIGITS), 2).to_bytes(4, "big")
+
+
 def BitwiseWith32Blocks(subcon):
     """
     Bit level decoding in Retro's format are done from least significant bit, but in blocks of 32 bits.
@@ -60,9 +77,9 @@ def BitwiseWith32Blocks(subcon):
     """
     return construct.Restreamed(
         subcon,
-        lambda data: bytes(reversed(construct.bytes2bits(data))),
+        _decode_32_bits,
         4,
-        lambda data: construct.bits2bytes(bytes(reversed(data))),
+        _encode_32_bits,
         32,
         lambda n: n // 32,
     )
@@ -110,14 +127,32 @@ class ErrorWithMessage(Construct):
         raise construct.SizeofError("Error does not have size, because it interrupts parsing and building", path=path)
 
 
-def LabeledOptional(label, subcon):
-    return Optional(
-        FocusedSeq(
-            "subcon",
-            Const(label),
-            "subcon" / subcon,
-        )
-    )
+class LabeledOptional(construct.Subconstruct):
+    """
+    Parses `subcon` only when the stream continues with `label`, otherwise returns None without consuming anything.
+    Builds `label` followed by `subcon`, or nothing when the value is None.
+    """
+
+    def __init__(self, label: bytes, subcon):
+        super().__init__(subcon)
+        self.label = label
+        self.flagbuildnone = True
+
+    def _parse(self, stream, context, path):
+        peek = stream.read(len(self.label))
+        if peek != self.label:
+            stream.seek(-len(peek), 1)
+            return None
+        return self.subcon._parsereport(stream, context, path)
+
+    def _build(self, obj, stream, context, path):
+        if obj is None:
+            return None
+        construct.stream_write(stream, self.label, len(self.label), path)
+        return self.subcon._build(obj, stream, context, path)
+
+    def _sizeof(self, context, path):
+        raise construct.SizeofError("size depends on whether the label is present", path=path)
 
 
 class UntilEof(construct.Subconstruct):
@@ -140,3 +175,49 @@ class UntilEof(construct.Subconstruct):
 
     def _sizeof(self, context, path):
         raise construct.SizeofError("cannot calculate size, amount depends on actual data", path=path)
+
+
+class PrefixedPodArray(construct.Construct):
+    """
+    Equivalent to `PrefixedArray(count_field, Array(width, element))` for a fixed size big-endian `element`,
+    but reads and writes all values with a single `struct` call instead of one construct per value.
+    When `width` is None, it's equivalent to `PrefixedArray(count_field, element)`.
+    """
+
+    def __init__(self, count_field: construct.Construct, element_format: str, width: int | None = None):
+        super().__init__()
+        self.count_field = count_field
+        self.element_format = element_format
+        self.width = width
+        self.element_size = struct.calcsize(f">{element_format}") * (width or 1)
+
+    def _parse(self, stream, context, path):
+        count = self.count_field._parsereport(stream, context, path)
+        if count < 0:
+            raise construct.RangeError(f"invalid count {count}", path=path)
+        data = construct.stream_read(stream, count * self.element_size, path)
+        width = self.width
+        if width is None:
+            return construct.ListContainer(struct.unpack(f">{count}{self.element_format}", data))
+        values = struct.unpack(f">{count * width}{self.element_format}", data)
+        return construct.ListContainer(
+            construct.ListContainer(values[i : i + width]) for i in range(0, len(values), width)
+        )
+
+    def _build(self, obj, stream, context, path):
+        width = self.width
+        if width is None:
+            values = obj
+        else:
+            values = []
+            for item in obj:
+                if len(item) != width:
+                    raise construct.RangeError(f"expected {width} elements, found {len(item)}", path=path)
+                values.extend(item)
+        self.count_field._build(len(obj), stream, context, path)
+        try:
+            data = struct.pack(f">{len(values)}{self.element_format}", *values)
+        except struct.error as e:
+            raise construct.FormatFieldError(str(e), path=path) from e
+        construct.stream_write(stream, data, len(data), path)
+        return obj
@@ -7,14 +7,15 @@ from construct import EnumIntegerString, If, IfThenElse
 
 
 def get_version(this, enum_type):
-    if "version" not in this:
-        return get_version(this["_"], enum_type)
-    else:
-        if isinstance(this.version, EnumIntegerString):
-            return int(this.version)
-        if enum_type and isinstance(this.version, str):
-            return enum_type[this.version]
-        return this.version
+    while "version" not in this:
+        this = this["_"]
+
+    version = this.version
+    if isinstance(version, EnumIntegerString):
+        return int(version)
+    if enum_type and isinstance(version, str):
+        return enum_type[version]
+    return version
 
 
 def compare_version(version):
@@ -24,12 +25,15 @@ def compare_version(version):
 
 
 def WithVersionElse(version, with_subcon, before_subcon):
-    return IfThenElse(lambda this: compare_version(version)(this) >= version, with_subcon, before_subcon)
+    get = compare_version(version)
+    return IfThenElse(lambda this: get(this) >= version, with_subcon, before_subcon)
 
 
 def WithVersion(version, subcon):
-    return If(lambda this: compare_version(version)(this) >= version, subcon)
+    get = compare_version(version)
+    return If(lambda this: get(this) >= version, subcon)
 
 
 def BeforeVersion(version, subcon):
-    return If(lambda this: compare_version(version)(this) < version, subcon)
+    get = compare_version(version)
+    return If(lambda this: get(this) < version, subcon)
@@ -186,12 +186,15 @@ class EncryptedDiscFileReader(disc_common.DiscFileReader):
         self._initial_offset = offset
         self._offset = offset
         self._cur_block = -1
+        self._enc_buf = bytearray(0x8000)
         self._dec_buf = bytearray(0x8000 - 0x400)
 
     def _decrypt_block(self, block: int) -> None:
         self._cur_block = block
         self._file.seek(self._base_offset + self._cur_block * 0x8000)
-        enc_buf = memoryview(self._file.read(0x8000))
+        if self._file.readinto(self._enc_buf) != len(self._enc_buf):
+            raise OSError(f"Unexpected end of partition while reading block {block}")
+        enc_buf = memoryview(self._enc_buf)
         aes = AES.new(key=self._dec_key, mode=AES.MODE_CBC, iv=enc_buf[0x3D0:0x3E0])
         aes.decrypt(enc_buf[0x400:], self._dec_buf)
 
@@ -202,8 +205,9 @@ class EncryptedDiscFileReader(disc_common.DiscFileReader):
         if size == -1:
             size = self._size - (self._offset - self._initial_offset)
 
-        ret = bytearray()
+        ret = bytearray(size)
         rem = size
+        pos = 0
 
         while rem > 0:
             if block_quot != self._cur_block:
@@ -213,7 +217,8 @@ class EncryptedDiscFileReader(disc_common.DiscFileReader):
             if cache_size + block_rem > 0x7C00:
                 cache_size = 0x7C00 - block_rem
 
-            ret += memoryview(self._dec_buf)[block_rem : block_rem + cache_size]
+            ret[pos : pos + cache_size] = memoryview(self._dec_buf)[block_rem : block_rem + cache_size]
+            pos += cache_size
             rem -= cache_size
             block_rem = 0
             block_quot += 1
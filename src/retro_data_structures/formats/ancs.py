@@ -43,7 +43,7 @@ ParticleResourceData = Struct(
 AnimationAABB = Struct(
     name=String,
     bounding_box=AABox,
-)
+).compile()
 EffectComponent = Struct(
     name=String,
     particle=ObjectTag_32,
@@ -60,7 +60,7 @@ Effect = Struct(
 IndexedAnimationAABB = Struct(
     id=Int32ub,
     bounding_box=AABox,
-)
+).compile()
 
 Character = Struct(
     id=Int32ub,
@@ -105,7 +105,7 @@ AdditiveAnimation = Struct(
     animation_id=Int32ub,
     fade_in_time=Float32b,
     fade_out_time=Float32b,
-)
+).compile()
 
 HalfTransitions = Struct(
     animation_id=Int32ub,
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import struct
 import typing
 
 import construct
@@ -7,8 +8,8 @@ from construct import (
     Aligned,
     Array,
     Bit,
-    BitsInteger,
     Const,
+    Container,
     ExprAdapter,
     Float32b,
     GreedyRange,
@@ -17,10 +18,13 @@ from construct import (
     Int8ub,
     Int16ub,
     Int32ub,
+    ListContainer,
+    Pass,
     Pointer,
     PrefixedArray,
     Rebuild,
     Struct,
+    Switch,
     Tell,
     Terminated,
 )
@@ -28,25 +32,33 @@ from construct import (
 from retro_data_structures import game_check
 from retro_data_structures.base_resource import AssetType, BaseResource, Dependency
 from retro_data_structures.common_types import CharAnimTime
-from retro_data_structures.construct_extensions.misc import BitwiseWith32Blocks
-
-if typing.TYPE_CHECKING:
-    from retro_data_structures.game_check import Game
-
-UncompressedAnimation = Struct(
-    duration=CharAnimTime,
-    key_interval=CharAnimTime,
-    key_count=Int32ub,
-    root_bone_id=Int32ub,
-    bone_channel_index_array=PrefixedArray(Const(0x64, Int32ub), Int8ub),
-    rotation_channel_index_array=If(game_check.is_prime2, PrefixedArray(Int32ub, Int8ub)),
-    translation_channel_index_array=PrefixedArray(Int32ub, Int8ub),
-    scale_channel_index_array=If(game_check.is_prime2, PrefixedArray(Int32ub, Int8ub)),
-    scale_key_array=If(game_check.is_prime2, PrefixedArray(Int32ub, Array(3, Float32b))),
-    rotation_key_array=PrefixedArray(Int32ub, Array(4, Float32b)),
-    translation_key_array=PrefixedArray(Int32ub, Array(3, Float32b)),
-    event_id=If(game_check.is_prime1, Int32ub),
-)
+from retro_data_structures.construct_extensions.misc import BitwiseWith32Blocks, PrefixedPodArray
+from retro_data_structures.game_check import Game
+
+
+def _for_game(condition: bool, subcon: construct.Construct) -> construct.Construct:
+    # Fields missing in a game still show up as None, like they would with an `If`
+    return subcon if condition else Pass
+
+
+def _uncompressed_animation(game: Game) -> construct.Construct:
+    is_prime1 = game == Game.PRIME
+    is_prime2 = game == Game.ECHOES
+    return Struct(
+        duration=CharAnimTime,
+        key_interval=CharAnimTime,
+        key_count=Int32ub,
+        root_bone_id=Int32ub,
+        bone_channel_index_array=PrefixedPodArray(Const(0x64, Int32ub), "B"),
+        rotation_channel_index_array=_for_game(is_prime2, PrefixedPodArray(Int32ub, "B")),
+        translation_channel_index_array=PrefixedPodArray(Int32ub, "B"),
+        scale_channel_index_array=_for_game(is_prime2, PrefixedPodArray(Int32ub, "B")),
+        scale_key_array=_for_game(is_prime2, PrefixedPodArray(Int32ub, "f", 3)),
+        rotation_key_array=PrefixedPodArray(Int32ub, "f", 4),
+        translation_key_array=PrefixedPodArray(Int32ub, "f", 3),
+        event_id=_for_game(is_prime1, Int32ub),
+    )
+
 
 BoneChannelBits = Struct(
     "initial_x" / Int16ub,
@@ -57,103 +69,216 @@ BoneChannelBits = Struct(
     "delta_z" / Int8ub,
 )
 
-BoneChannelDescriptor = Struct(
-    "bone_id" / IfThenElse(game_check.is_prime2, Int8ub, Int32ub),
-    "rotation_keys_count" / Int16ub,
-    "rotation_keys" / If(construct.this.rotation_keys_count != 0, BoneChannelBits),
-    "translation_keys_count" / Int16ub,
-    "translation_keys" / If(construct.this.translation_keys_count != 0, BoneChannelBits),
-    "scale_keys_count" / If(game_check.is_prime2, Int16ub),
-    "scale_keys" / If(game_check.is_prime2, If(construct.this.scale_keys_count != 0, BoneChannelBits)),
-)
-
 
-def create_bits_field(descriptor):
+def _bone_channel_descriptor(game: Game) -> construct.Construct:
+    is_prime2 = game == Game.ECHOES
     return Struct(
-        x=BitsInteger(lambda this: descriptor(this).delta_x),
-        y=BitsInteger(lambda this: descriptor(this).delta_y),
-        z=BitsInteger(lambda this: descriptor(this).delta_z),
+        "bone_id" / (Int8ub if is_prime2 else Int32ub),
+        "rotation_keys_count" / Int16ub,
+        "rotation_keys" / If(construct.this.rotation_keys_count != 0, BoneChannelBits),
+        "translation_keys_count" / Int16ub,
+        "translation_keys" / If(construct.this.translation_keys_count != 0, BoneChannelBits),
+        "scale_keys_count" / _for_game(is_prime2, Int16ub),
+        "scale_keys" / _for_game(is_prime2, If(construct.this.scale_keys_count != 0, BoneChannelBits)),
     )
 
 
-def get_anim(this):
-    context = this
-    while "bone_channel_descriptors" not in context:
-        context = context["_"]
-    return context
-
-
-def get_descriptor(this):
-    return get_anim(this).bone_channel_descriptors[this._index]
-
-
-CompressedAnimation = Struct(
-    _start=Tell,
-    scratch_size=Int32ub,
-    event_id=If(game_check.is_prime1, Int32ub),
-    unk_1=If(game_check.is_prime1, Const(0x00000001, Int32ub)),
-    unk_2=If(game_check.is_prime2, Const(0x0101, Int16ub)),
-    duration=Float32b,
-    interval=Float32b,
-    root_bone_id=Int32ub,
-    looping_flag=Int32ub,
-    rotation_divisor=Int32ub,
-    translation_multiplier=Float32b,
-    scale_multiplier=If(game_check.is_prime2, Float32b),
-    _bone_channel_count=Rebuild(Int32ub, construct.len_(construct.this.bone_channel_descriptors)),
-    unk_3=Int32ub,
-    _key_bitmap_count=Rebuild(Int32ub, construct.len_(construct.this.animation_keys) + 1),
-    _key_bitmap_array=BitwiseWith32Blocks(
-        Aligned(
-            32,
-            Array(
-                construct.this._key_bitmap_count,
-                Rebuild(
-                    ExprAdapter(Bit, lambda raw, ctx: bool(raw), lambda i, ctx: int(i)),
-                    lambda ctx: ctx.animation_keys[ctx._index - 1].channels is not None if ctx._index > 0 else True,
-                ),
-            ),
+# Maps each byte to the same byte with its bits in reverse order
+_REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+_Widths = tuple[int, int, int]
+
+
+class AnimationKeys(construct.Construct):
+    """
+    The channel values of every key in a compressed animation.
+
+    These are a bit stream with the same layout as `BitwiseWith32Blocks(Aligned(32, ...))`, with the width of each
+    value coming from the bone channel descriptors. Decoding it here in a single pass avoids going through a
+    `BitsInteger` with a width callback for every single value.
+    """
+
+    def __init__(self, with_scale: bool):
+        super().__init__()
+        self.with_scale = with_scale
+
+    @staticmethod
+    def _channel_layouts(descriptors, with_scale: bool) -> list[tuple[_Widths | None, _Widths | None, _Widths | None]]:
+        """
+        For each bone channel, the bit widths of the rotation, translation and scale values.
+        None when the channel doesn't have that kind of key.
+        """
+
+        def widths(count: int, bits) -> _Widths | None:
+            if count > 0:
+                return bits.delta_x, bits.delta_y, bits.delta_z
+            return None
+
+        return [
+            (
+                widths(descriptor.rotation_keys_count, descriptor.rotation_keys),
+                widths(descriptor.translation_keys_count, descriptor.translation_keys),
+                widths(descriptor.scale_keys_count, descriptor.scale_keys) if with_scale else None,
+            )
+            for descriptor in descriptors
+        ]
+
+    def _parse(self, stream, context, path):
+        layouts = self._channel_layouts(
+            context.bone_channel_descriptors[: context._bone_channel_count], self.with_scale
+        )
+        bitmap = context._key_bitmap_array
+        key_count = context._key_bitmap_count - 1
+
+        bits_per_key = sum(sum(widths) for layout in layouts for widths in layout if widths is not None) + sum(
+            1 for rotation, _, _ in layouts if rotation is not None
         )
-    ),
-    _bone_channel_count_2=If(game_check.is_prime1, Rebuild(Int32ub, construct.this._bone_channel_count)),
-    bone_channel_descriptors=PrefixedArray(Int32ub, BoneChannelDescriptor),
-    animation_keys=BitwiseWith32Blocks(
-        Aligned(
-            32,
-            Array(
-                construct.this._key_bitmap_count - 1,
-                Struct(
-                    channels=If(
-                        lambda this: get_anim(this)._key_bitmap_array[this._index + 1],
-                        Array(
-                            lambda this: get_anim(this)._bone_channel_count,
-                            Struct(
-                                rotation=If(
-                                    lambda this: get_descriptor(this).rotation_keys_count > 0,
-                                    Struct(
-                                        wsign=Bit,
-                                        data=create_bits_field(lambda this: get_descriptor(this).rotation_keys),
-                                    ),
-                                ),
-                                translation=If(
-                                    lambda this: get_descriptor(this).translation_keys_count > 0,
-                                    create_bits_field(lambda this: get_descriptor(this).translation_keys),
-                                ),
-                                scale=If(
-                                    lambda this: game_check.is_prime2(this)
-                                    and get_descriptor(this).scale_keys_count > 0,
-                                    create_bits_field(lambda this: get_descriptor(this).scale_keys),
-                                ),
-                            ),
-                        ),
+        keys_with_channels = sum(1 for i in range(key_count) if bitmap[i + 1])
+        word_count = (keys_with_channels * bits_per_key + 31) // 32
+
+        # Reversing the bits of each 32-bit block turns the stream into a plain MSB-first one
+        data = construct.stream_read(stream, word_count * 4, path)
+        words = iter(struct.unpack(f"<{word_count}L", data.translate(_REVERSED_BITS)))
+        buffer = 0
+        buffer_size = 0
+
+        def read(size: int) -> int:
+            nonlocal buffer, buffer_size
+            while buffer_size < size:
+                buffer = (buffer << 32) | next(words)
+                buffer_size += 32
+            buffer_size -= size
+            value = buffer >> buffer_size
+            buffer &= (1 << buffer_size) - 1
+            return value
+
+        def read_values(widths: _Widths) -> Container:
+            return Container(x=read(widths[0]), y=read(widths[1]), z=read(widths[2]))
+
+        result = ListContainer()
+        for i in range(key_count):
+            if not bitmap[i + 1]:
+                result.append(Container(channels=None))
+                continue
+
+            channels = ListContainer()
+            for rotation_widths, translation_widths, scale_widths in layouts:
+                rotation = None
+                translation = None
+                scale = None
+                if rotation_widths is not None:
+                    wsign = read(1)
+                    rotation = Container(wsign=wsign, data=read_values(rotation_widths))
+                if translation_widths is not None:
+                    translation = read_values(translation_widths)
+                if scale_widths is not None:
+                    scale = read_values(scale_widths)
+                channels.append(Container(rotation=rotation, translation=translation, scale=scale))
+
+            result.append(Container(channels=channels))
+
+        return result
+
+    def _build(self, obj, stream, context, path):
+        channel_count = context._bone_channel_count
+        layouts = self._channel_layouts(context.bone_channel_descriptors[:channel_count], self.with_scale)
+        bitmap = context._key_bitmap_array
+        key_count = context._key_bitmap_count - 1
+
+        if len(obj) != key_count:
+            raise construct.RangeError(f"expected {key_count} keys, found {len(obj)}", path=path)
+
+        words = []
+        buffer = 0
+        buffer_size = 0
+
+        def write(value: int, size: int) -> None:
+            nonlocal buffer, buffer_size
+            if not 0 <= value < (1 << size):
+                raise construct.IntegerError(f"value {value} does not fit in {size} bits", path=path)
+            buffer = (buffer << size) | value
+            buffer_size += size
+            while buffer_size >= 32:
+                buffer_size -= 32
+                words.append(buffer >> buffer_size)
+                buffer &= (1 << buffer_size) - 1
+
+        def write_values(values, widths: _Widths) -> None:
+            write(values.x, widths[0])
+            write(values.y, widths[1])
+            write(values.z, widths[2])
+
+        for i, key in enumerate(obj):
+            if not bitmap[i + 1]:
+                continue
+
+            if len(key.channels) != channel_count:
+                raise construct.RangeError(
+                    f"expected {channel_count} channels, found {len(key.channels)}", path=f"{path} -> {i}"
+                )
+
+            for channel, (rotation_widths, translation_widths, scale_widths) in zip(key.channels, layouts):
+                if rotation_widths is not None:
+                    write(channel.rotation.wsign, 1)
+                    write_values(channel.rotation.data, rotation_widths)
+                if translation_widths is not None:
+                    write_values(channel.translation, translation_widths)
+                if scale_widths is not None:
+                    write_values(channel.scale, scale_widths)
+
+        if buffer_size > 0:
+            words.append(buffer << (32 - buffer_size))
+
+        construct.stream_write(
+            stream, struct.pack(f"<{len(words)}L", *words).translate(_REVERSED_BITS), len(words) * 4, path
+        )
+        return obj
+
+
+def _compressed_animation(game: Game) -> construct.Construct:
+    is_prime1 = game == Game.PRIME
+    is_prime2 = game == Game.ECHOES
+    return Struct(
+        _start=Tell,
+        scratch_size=Int32ub,
+        event_id=_for_game(is_prime1, Int32ub),
+        unk_1=_for_game(is_prime1, Const(0x00000001, Int32ub)),
+        unk_2=_for_game(is_prime2, Const(0x0101, Int16ub)),
+        duration=Float32b,
+        interval=Float32b,
+        root_bone_id=Int32ub,
+        looping_flag=Int32ub,
+        rotation_divisor=Int32ub,
+        translation_multiplier=Float32b,
+        scale_multiplier=_for_game(is_prime2, Float32b),
+        _bone_channel_count=Rebuild(Int32ub, construct.len_(construct.this.bone_channel_descriptors)),
+        unk_3=Int32ub,
+        _key_bitmap_count=Rebuild(Int32ub, construct.len_(construct.this.animation_keys) + 1),
+        _key_bitmap_array=BitwiseWith32Blocks(
+            Aligned(
+                32,
+                Array(
+                    construct.this._key_bitmap_count,
+                    Rebuild(
+                        ExprAdapter(Bit, lambda raw, ctx: bool(raw), lambda i, ctx: int(i)),
+                        lambda ctx: ctx.animation_keys[ctx._index - 1].channels is not None if ctx._index > 0 else True,
                     ),
                 ),
-            ),
-        )
-    ),
-    _end=Tell,
-    _update_scratch_size=Pointer(construct.this._start, Rebuild(Int32ub, construct.this._end - construct.this._start)),
-)
+            )
+        ),
+        _bone_channel_count_2=_for_game(is_prime1, Rebuild(Int32ub, construct.this._bone_channel_count)),
+        bone_channel_descriptors=PrefixedArray(Int32ub, _bone_channel_descriptor(game)),
+        animation_keys=AnimationKeys(with_scale=is_prime2),
+        _end=Tell,
+        _update_scratch_size=Pointer(
+            construct.this._start, Rebuild(Int32ub, construct.this._end - construct.this._start)
+        ),
+    )
+
+
+UncompressedAnimation = Switch(game_check.get_current_game, {game: _uncompressed_animation(game) for game in Game})
+CompressedAnimation = Switch(game_check.get_current_game, {game: _compressed_animation(game) for game in Game})
 
 ANIM = Struct(
     anim_version=Int32ub,
@@ -5,13 +5,18 @@ import typing
 import construct
 
 from retro_data_structures.base_resource import AssetId, AssetType, BaseResource, Dependency
-from retro_data_structures.game_check import AssetIdCorrect, Game
+from retro_data_structures.construct_extensions.misc import PrefixedPodArray
+from retro_data_structures.game_check import CurrentGameCheck, Game
 
 MAPW = construct.Struct(
     _magic=construct.Const(0xDEADF00D, construct.Int32ub),
     _version=construct.Const(1, construct.Int32ub),
-    area_map=construct.PrefixedArray(construct.Int32ub, AssetIdCorrect),
-)
+    area_map=CurrentGameCheck(
+        Game.CORRUPTION,
+        PrefixedPodArray(construct.Int32ub, "Q"),
+        PrefixedPodArray(construct.Int32ub, "L"),
+    ),
+).compile()
 
 
 def dependencies_for(obj, target_game):
@@ -4,10 +4,10 @@ Wiki: https://wiki.axiodl.com/w/MREA_(Metroid_Prime_2)
 
 from __future__ import annotations
 
-import copy
 import dataclasses
 import io
 import itertools
+import struct
 import typing
 from enum import IntEnum
 
@@ -81,15 +81,12 @@ class AreaDependencyAdapter(Adapter):
         )
 
     def _decode(self, obj, context, path) -> AreaDependencies:
-        layers = []
-        for start, finish in zip(obj.offsets, obj.offsets[1:]):
-            layers.append(
-                [Dependency(dep.asset_type.decode("ascii"), dep.asset_id) for dep in obj.dependencies[start:finish]]
-            )
+        # Decode the flat table once, then slice it into layers
+        dependencies = [Dependency(dep["asset_type"].decode("ascii"), dep["asset_id"]) for dep in obj["dependencies"]]
+        offsets = obj["offsets"]
 
-        non_layer = [
-            Dependency(dep.asset_type.decode("ascii"), dep.asset_id) for dep in obj.dependencies[obj.offsets[-1] :]
-        ]
+        layers = [dependencies[start:finish] for start, finish in itertools.pairwise(offsets)]
+        non_layer = dependencies[offsets[-1] :]
 
         return AreaDependencies(layers, non_layer)
 
@@ -167,6 +164,8 @@ _CATEGORY_ENCODINGS = {
         unk2=PrefixedArray(Int32ub, Enum(Int8ub, ON=0xFF, OFF=0x00)),
     ),
 }
+_ALIGNED_GREEDY_BYTES = Aligned(32, GreedyBytes)
+_ALIGNED_CATEGORY_ENCODINGS = {category: Aligned(32, subcon) for category, subcon in _CATEGORY_ENCODINGS.items()}
 
 MREAHeader = Aligned(
     32,
@@ -219,6 +218,9 @@ CompressedBlockHeader = Struct(
 )
 
 
+_PAD32 = b"\x00" * 32
+
+
 def _get_compressed_block_size(header):
     if not header.compressed_size:
         return header.uncompressed_size
@@ -231,6 +233,44 @@ def _get_compressed_block_subcon(compressed_size, uncompressed_size):
     return DataSection(GreedyBytes, size=lambda: Computed(uncompressed_size))
 
 
+def _build_aligned_uint32s(values: list[int], stream, path):
+    # Same as `Aligned(32, Array(len(values), Int32ub))`, with a single struct call
+    data = struct.pack(f">{len(values)}L", *values)
+    data += _PAD32[: -len(data) % 32]
+    construct.stream_write(stream, data, len(data), path)
+
+
+# Script layers and generated objects always get blocks of their own
+_BLOCK_BOUNDARY_LABELS = frozenset(["script_layers_section", "generated_script_objects_section"])
+
+
+def _start_new_group(group_size, section_size, curr_label, prev_label):
+    if group_size == 0:
+        return False, ""
+
+    if group_size + section_size > 0x20000:
+        return True, "Next section too big."
+
+    if curr_label in _BLOCK_BOUNDARY_LABELS:
+        return True, f"New {curr_label}."
+
+    if prev_label in _BLOCK_BOUNDARY_LABELS:
+        return True, f"Previous {prev_label} completed."
+
+    return False, ""
+
+
+def _decompress_block(header, compressed_block: bytes, context, path) -> bytes:
+    subcon = _get_compressed_block_subcon(header.compressed_size, header.uncompressed_size)
+    decompressed_block = subcon._parsereport(io.BytesIO(compressed_block), context, path)
+    if len(decompressed_block) != header.uncompressed_size:
+        raise construct.ConstructError(
+            f"Expected {header.uncompressed_size} bytes, got {len(decompressed_block)}",
+            path,
+        )
+    return decompressed_block
+
+
 def _decode_category(category: list[bytes], subcon: construct.Construct, context, path):
     result = ListContainer()
 
@@ -245,18 +285,18 @@ def _decode_category(category: list[bytes], subcon: construct.Construct, context
     return result
 
 
-def _encode_category(category: list, subcon: construct.Construct, context, path) -> list[bytes]:
+def _encode_category(category: list, aligned_subcon: construct.Construct, context, path) -> list[bytes]:
     result = ListContainer()
+    stream = io.BytesIO()
 
     for section in category:
         if section is not None:
-            stream = io.BytesIO()
-            if isinstance(section, bytes) or subcon is None:
-                this_subcon = GreedyBytes
+            stream.seek(0)
+            stream.truncate()
+            if isinstance(section, bytes):
+                _ALIGNED_GREEDY_BYTES._build(section, stream, context, path)
             else:
-                this_subcon = subcon
-
-            Aligned(32, this_subcon)._build(section, stream, context, path)
+                aligned_subcon._build(section, stream, context, path)
             data = stream.getvalue()
         else:
             data = b""
@@ -289,15 +329,7 @@ class MREAConstruct(construct.Construct):
         # Decompress blocks into the data sections
         data_sections = ListContainer()
         for compressed_header, compressed_block in zip(compressed_block_headers, compressed_blocks):
-            subcon = _get_compressed_block_subcon(
-                compressed_header.compressed_size, compressed_header.uncompressed_size
-            )
-            decompressed_block = subcon._parsereport(io.BytesIO(compressed_block), context, path)
-            if len(decompressed_block) != compressed_header.uncompressed_size:
-                raise construct.ConstructError(
-                    f"Expected {compressed_header.uncompressed_size} bytes, got {len(decompressed_block)}",
-                    path,
-                )
+            decompressed_block = _decompress_block(compressed_header, compressed_block, context, path)
             offset = 0
 
             for i in range(compressed_header.data_section_count):
@@ -321,18 +353,14 @@ class MREAConstruct(construct.Construct):
             )._parsereport(stream, context, path)
 
         # Split data sections into the named sections
-        categories = [
-            {"label": label, "value": mrea_header[label]} for label in _all_categories if mrea_header[label] is not None
-        ]
-        categories.sort(key=lambda c: c["value"])
+        # Stable sort, so categories sharing a start keep their _all_categories order
+        starts = [(start, label) for label in _all_categories if (start := mrea_header[label]) is not None]
+        starts.sort(key=lambda it: it[0])
+        starts.append((None, None))
 
         sections = Container()
-        for i, c in enumerate(categories):
-            start = c["value"]
-            end = None
-            if i < len(categories) - 1:
-                end = categories[i + 1]["value"]
-            sections[c["label"]] = data_sections[start:end]
+        for (start, label), (end, _) in itertools.pairwise(starts):
+            sections[label] = data_sections[start:end]
 
         return Container(
             version=mrea_header.version,
@@ -345,32 +373,11 @@ class MREAConstruct(construct.Construct):
     def _encode_compressed_blocks(
         self, data_sections: list[bytes], category_starts: dict[str, int | None], context, path
     ):
-        def _start_new_group(group_size, section_size, curr_label, prev_label):  # noqa: PLR0911
-            if group_size == 0:
-                return False, ""
-
-            if group_size + section_size > 0x20000:
-                return True, "Next section too big."
-
-            if curr_label == "script_layers_section":
-                return True, "New SCLY section."
-
-            elif prev_label == "script_layers_section":
-                return True, "Previous SCLY completed."
-
-            if curr_label == "generated_script_objects_section":
-                return True, "New SCGN section."
-
-            elif prev_label == "generated_script_objects_section":
-                return True, "Previous SCGN completed."
-
-            return False, ""
-
-        compressed_blocks = ListContainer()
         filtered_starts = [(cat, start) for cat, start in category_starts.items() if start is not None]
         filtered_starts.sort(key=lambda it: it[1])
-        category_starts = dict(filtered_starts)
+        category_index = 0
 
+        compressed_blocks = ListContainer()
         current_group_size = 0
         current_group = []
         previous_label = ""
@@ -380,9 +387,13 @@ class MREAConstruct(construct.Construct):
             # print(f"Group complete! {r} Group size: {current_group_size}")
 
             # The padding is not included in the block's uncompressed size
-            merged_and_padded_group = b"".join(
-                item.ljust(len(item) + (-len(item) % 32), b"\x00") for item in current_group
-            )
+            merged_and_padded_parts = []
+            for item in current_group:
+                merged_and_padded_parts.append(item)
+                pad = -len(item) & 31
+                if pad:
+                    merged_and_padded_parts.append(_PAD32[:pad])
+            merged_and_padded_group = b"".join(merged_and_padded_parts)
             header = Container(
                 buffer_size=current_group_size,
                 uncompressed_size=current_group_size,
@@ -394,8 +405,7 @@ class MREAConstruct(construct.Construct):
             LZOCompressedBlock(header.uncompressed_size)._build(merged_and_padded_group, substream, context, path)
             data = substream.getvalue()
             compressed_size = len(data)
-            compressed_pad = (32 - (compressed_size % 32)) & 0x1F
-            if compressed_size + compressed_pad < header.uncompressed_size:
+            if compressed_size + (-compressed_size % 32) < header.uncompressed_size:
                 header.compressed_size = compressed_size
                 header.buffer_size += 0x120
             else:
@@ -411,10 +421,12 @@ class MREAConstruct(construct.Construct):
             current_group_size = 0
 
         for i, section in enumerate(data_sections):
-            all_garbage = [cat for cat, start in category_starts.items() if i >= start]
-            cat_label = all_garbage[-1]
+            # Advance to the last category starting at or before this section
+            while category_index + 1 < len(filtered_starts) and filtered_starts[category_index + 1][1] <= i:
+                category_index += 1
+            cat_label = filtered_starts[category_index][0]
 
-            start_new, reason = _start_new_group(current_group_size, len(section), previous_label, cat_label)
+            start_new, reason = _start_new_group(current_group_size, len(section), cat_label, previous_label)
             if start_new:
                 add_group(reason)
 
@@ -429,12 +441,15 @@ class MREAConstruct(construct.Construct):
     def _build(self, obj: Container, stream, context, path):
         mrea_header = Container()
 
-        raw_sections = copy.copy(obj.raw_sections)
+        raw_sections = Container(obj.raw_sections)
 
         # Encode each category
         for category, values in obj.sections.items():
             raw_sections[category] = _encode_category(
-                values, _CATEGORY_ENCODINGS.get(category), context, f"{path} -> {category}"
+                values,
+                _ALIGNED_CATEGORY_ENCODINGS.get(category, _ALIGNED_GREEDY_BYTES),
+                context,
+                f"{path} -> {category}",
             )
 
         # Combine all sections into the data sections array
@@ -462,17 +477,20 @@ class MREAConstruct(construct.Construct):
         mrea_header.data_section_count = len(data_sections)
 
         MREAHeader._build(mrea_header, stream, context, path)
-        Aligned(32, Array(mrea_header.data_section_count, Int32ub))._build(
-            [len(section) for section in data_sections],
-            stream,
-            context,
-            path,
-        )
+        _build_aligned_uint32s([len(section) for section in data_sections], stream, path)
         if compressed_blocks is not None:
-            Aligned(32, Array(mrea_header.compressed_block_count, CompressedBlockHeader))._build(
-                [block.header for block in compressed_blocks],
+            _build_aligned_uint32s(
+                [
+                    value
+                    for block in compressed_blocks
+                    for value in (
+                        block.header.buffer_size,
+                        block.header.uncompressed_size,
+                        block.header.compressed_size,
+                        block.header.data_section_count,
+                    )
+                ],
                 stream,
-                context,
                 path,
             )
             for compressed_block in compressed_blocks:
@@ -563,15 +581,17 @@ class Mrea(BaseResource):
             if self._script_layer_helpers is None:
                 self._script_layer_helpers = {}
 
+            # Layers are only parsed once they're reached, so stopping early skips decoding the remaining ones
             for i, section in enumerate(self._raw.sections.script_layers_section):
-                if i not in self._script_layer_helpers:
-                    self._script_layer_helpers[i] = ScriptLayer(
+                layer = self._script_layer_helpers.get(i)
+                if layer is None:
+                    layer = ScriptLayer(
                         _CATEGORY_ENCODINGS["script_layers_section"].parse(section, target_game=self.target_game),
                         i,
                         self.target_game,
                     )
-
-            yield from self._script_layer_helpers.values()
+                    self._script_layer_helpers[i] = layer
+                yield layer
 
     _generated_objects_layer: ScriptLayer | None = None
 
@@ -701,8 +721,7 @@ class Area:
 
     @property
     def all_instances(self) -> Iterator[ScriptInstance]:
-        for layer in self.all_layers:
-            yield from layer.instances
+        return itertools.chain.from_iterable(layer.instances for layer in self.all_layers)
 
     def get_instance(self, ref: InstanceRef) -> ScriptInstance:
         for layer in self.all_layers:
@@ -728,11 +747,7 @@ class Area:
         source_dock.connecting_dock[0].area_index = target_area._index
         source_dock.connecting_dock[0].dock_index = target_dock_number
 
-        attached_area_index = []
-        for docks in self._raw.docks:
-            for c in docks.connecting_dock:
-                if c.area_index not in attached_area_index:
-                    attached_area_index.append(c.area_index)
+        attached_area_index = dict.fromkeys(c.area_index for docks in self._raw.docks for c in docks.connecting_dock)
         self._raw.attached_area_index = construct.ListContainer(attached_area_index)
 
     def connect_dock_to(self, source_dock_number: int, target_area: Area, target_dock_number: int):
@@ -740,34 +755,37 @@ class Area:
         target_area._raw_connect_to(target_dock_number, self, source_dock_number)
 
     def build_non_layer_dependencies(self) -> typing.Iterator[Dependency]:
-        if self.asset_manager.target_game <= Game.ECHOES:
-            geometry_section = self.mrea.get_raw_section("geometry_section")
+        mrea = self.mrea
+        asset_manager = self.asset_manager
+        if asset_manager.target_game <= Game.ECHOES:
+            geometry_section = mrea.get_raw_section("geometry_section")
             if geometry_section:
                 for asset_id in PrefixedArray(Int32ub, AssetId32).parse(geometry_section[0]):
-                    yield from self.asset_manager.get_dependencies_for_asset(asset_id)
+                    yield from asset_manager.get_dependencies_for_asset(asset_id)
         else:
-            geometry = self.mrea.get_geometry()
+            geometry = mrea.get_geometry()
             if geometry is not None:
-                yield from dependencies_for_material_set(geometry[0].materials, self.asset_manager)
+                yield from dependencies_for_material_set(geometry[0].materials, asset_manager)
 
-        valid_asset = self.asset_manager.target_game.is_valid_asset_id
-        if valid_asset(portal_area := self.mrea.get_portal_area()):
+        valid_asset = asset_manager.target_game.is_valid_asset_id
+        if valid_asset(portal_area := mrea.get_portal_area()):
             yield Dependency("PTLA", portal_area)
-        if valid_asset(static_geometry_map := self.mrea.get_static_geometry_map()):
+        if valid_asset(static_geometry_map := mrea.get_static_geometry_map()):
             yield Dependency("EGMC", static_geometry_map)
-        if valid_asset(path := self.mrea.get_path()):
+        if valid_asset(path := mrea.get_path()):
             yield Dependency("PATH", path)
 
     def build_scgn_dependencies(self, layer_deps: list[list[Dependency]], only_modified: bool = False):
-        layer_deps = list(layer_deps)
+        # Dicts keep the first occurrence of each dependency, so duplicates are dropped as they're added
+        unique_layer_deps = [dict.fromkeys(deps) for deps in layer_deps]
 
         layers = list(self.layers)
         for instance in self.generated_objects_layer.instances:
             inst_layer = instance.id.layer
             if not only_modified or layers[inst_layer].is_modified:
-                layer_deps[inst_layer].extend(instance.mlvl_dependencies_for(self.asset_manager))
+                unique_layer_deps[inst_layer].update(dict.fromkeys(instance.mlvl_dependencies_for(self.asset_manager)))
 
-        return [list(dict.fromkeys(deps)) for deps in layer_deps]
+        return [list(deps) for deps in unique_layer_deps]
 
     def build_mlvl_dependencies(self, only_modified: bool = False):
         layer_deps = [
@@ -781,24 +799,23 @@ class Area:
 
         layer_deps = self.build_scgn_dependencies(layer_deps, only_modified)
 
-        if self.mrea_asset_id in _hardcoded_dependencies:
-            for layer_name, missing in _hardcoded_dependencies[self.mrea_asset_id].items():
-                if layer_name == "!!non_layer!!":
-                    continue
+        hardcoded = _hardcoded_dependencies.get(self.mrea_asset_id, {})
+        for layer_name, missing in hardcoded.items():
+            if layer_name == "!!non_layer!!":
+                continue
 
-                layer = self.get_layer(layer_name)
-                if only_modified and not layer.is_modified():
-                    continue
+            layer = self.get_layer(layer_name)
+            if only_modified and not layer.is_modified():
+                continue
 
-                layer_deps[layer.index].extend(missing)
+            layer_deps[layer.index].extend(missing)
 
         if only_modified:
             # assume we never modify these
             non_layer = self.dependencies.non_layer
         else:
             non_layer = list(self.build_non_layer_dependencies())
-            if "!!non_layer!!" in _hardcoded_dependencies.get(self.mrea_asset_id, {}):
-                non_layer.extend(_hardcoded_dependencies[self.mrea_asset_id]["!!non_layer!!"])
+            non_layer.extend(hardcoded.get("!!non_layer!!", ()))
 
         self.dependencies = AreaDependencies(layer_deps, non_layer)
 
@@ -811,9 +828,10 @@ class Area:
         asset_manager = self._parent_mlvl.asset_manager
         paks = list(asset_manager.find_paks(self.mrea_asset_id))
 
-        for dep in self.dependencies_for():
+        # The same asset is often a dependency of many objects, but only needs to be ensured once
+        for asset_id in dict.fromkeys(dep.id for dep in self.dependencies_for()):
             for pak in paks:
-                asset_manager.ensure_present(pak, dep.id)
+                asset_manager.ensure_present(pak, asset_id)
 
     def build_module_dependencies(self, only_modified: bool = False):
         if self._parent_mlvl.asset_manager.target_game == Game.PRIME:
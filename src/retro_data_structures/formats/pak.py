@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import typing
 
-from retro_data_structures.base_resource import AssetId, RawResource
+from retro_data_structures.base_resource import AssetId, AssetType, RawResource
 from retro_data_structures.formats import pak_gc, pak_wii, pak_wiiu
 from retro_data_structures.formats.pak_gc import PakBody, PakFile
 from retro_data_structures.game_check import Game
@@ -10,6 +10,8 @@ from retro_data_structures.game_check import Game
 if typing.TYPE_CHECKING:
     from collections.abc import Iterator
 
+    import construct
+
 
 def _pak_for_game(game: Game):
     if game == Game.PRIME_REMASTER:
@@ -20,6 +22,13 @@ def _pak_for_game(game: Game):
         return pak_gc.PAK_GC
 
 
+class PakResourceLocation(typing.NamedTuple):
+    asset_type: AssetType
+    offset: int
+    size: int
+    compressed: bool
+
+
 class Pak:
     _raw: PakBody
     target_game: Game
@@ -37,6 +46,42 @@ class Pak:
         else:
             return pak_gc.PAKNoData
 
+    @staticmethod
+    def resource_locations(header: construct.Container, game: Game) -> dict[AssetId, PakResourceLocation]:
+        """
+        Where the data of each asset is in a PAK file, given its header as parsed by `header_for_game`.
+        Like `get_asset`, only the first entry is used when an asset is present more than once.
+        """
+        if game == Game.PRIME_REMASTER:
+            # Offsets are absolute and the data is always stored uncompressed
+            return {
+                resource.asset_id: PakResourceLocation(resource.asset_type, resource.offset, resource.size, False)
+                for resource in reversed(header.resources)
+            }
+
+        # For Wii, offsets are relative to the data section, right after the header
+        data_start = header._resources_end if game >= Game.CORRUPTION else 0
+        return {
+            resource.asset_id: PakResourceLocation(
+                resource.asset_type, data_start + resource.offset, resource.size, resource.compressed > 0
+            )
+            for resource in reversed(header.resources)
+        }
+
+    @staticmethod
+    def read_resource(stream: typing.BinaryIO, location: PakResourceLocation, game: Game) -> RawResource:
+        """
+        Reads a single asset from a PAK file, without parsing the rest of it.
+        """
+        stream.seek(location.offset)
+        data = stream.read(location.size)
+        if location.compressed:
+            compressed_resource = (
+                pak_wii.CompressedPakResource if game >= Game.CORRUPTION else pak_gc.CompressedPakResource
+            )
+            data = compressed_resource.parse(data, target_game=game)
+        return RawResource(location.asset_type, data)
+
     @classmethod
     def parse(cls: type[Pak], data: bytes, target_game: Game) -> Pak:
         return cls(_pak_for_game(target_game).parse(data, target_game=target_game), target_game)
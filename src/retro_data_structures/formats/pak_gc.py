@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import dataclasses
+import struct
+import sys
 from typing import TYPE_CHECKING
 
 import construct
@@ -29,18 +31,46 @@ ConstructResourceHeader = Struct(
 )
 
 
-def _emitparse_header(code: construct.CodeGen) -> str:
-    code.append("ResourceHeader_Format = struct.Struct('>LLLLL')")
-    code.append(
-        """def _create_resource_header(compressed, asset_type, asset_id, size, offset):
-    return Container(compressed=compressed, asset_type=asset_type.to_bytes(4, "big").decode("ascii"),
-                     asset_id=asset_id, size=size, offset=offset)
+class ResourceHeaders(construct.Construct):
     """
-    )
-    return "_create_resource_header(*ResourceHeader_Format.unpack(io.read(20)))"
+    Equivalent to `PrefixedArray(Int32ub, resource_header)`, but parses the whole table with a single read and
+    `struct.iter_unpack`, instead of one construct per field of each of the thousands of resources in a PAK.
+    `resource_format` is the `struct` format of `resource_header`.
+    """
+
+    def __init__(self, resource_header: construct.Construct, resource_format: str):
+        super().__init__()
+        self.resource_format = struct.Struct(resource_format)
+        self.table = PrefixedArray(Int32ub, resource_header)
+
+    def _parse(self, stream, context, path):
+        count = Int32ub._parsereport(stream, context, path)
+        data = construct.stream_read(stream, count * self.resource_format.size, path)
+
+        # There's only a few distinct types, so decode each once and share the same string between all resources
+        type_names: dict[int, str] = {}
+        resources = construct.ListContainer()
+        for compressed, asset_type, asset_id, size, offset in self.resource_format.iter_unpack(data):
+            type_name = type_names.get(asset_type)
+            if type_name is None:
+                type_name = type_names[asset_type] = sys.intern(asset_type.to_bytes(4, "big").decode("ascii"))
+            resources.append(
+                construct.Container(
+                    compressed=compressed,
+                    asset_type=type_name,
+                    asset_id=asset_id,
+                    size=size,
+                    offset=offset,
+                )
+            )
+        return resources
+
+    def _build(self, obj, stream, context, path):
+        return self.table._build(obj, stream, context, path)
 
+    def _sizeof(self, context, path):
+        raise construct.SizeofError(path=path)
 
-ConstructResourceHeader._emitparse = _emitparse_header
 
 PAKNoData = Struct(
     _header=PAKHeader,
@@ -52,7 +82,7 @@ PAKNoData = Struct(
             name=PascalString(Int32ub, "utf-8"),
         ),
     ),
-    resources=PrefixedArray(Int32ub, ConstructResourceHeader),
+    resources=ResourceHeaders(ConstructResourceHeader, ">LLLLL"),
 ).compile()
 
 CompressedPakResource = FocusedSeq(
@@ -12,6 +12,7 @@ from retro_data_structures.common_types import AssetId64, FourCC, String
 from retro_data_structures.construct_extensions.alignment import AlignTo
 from retro_data_structures.construct_extensions.dict import make_dict
 from retro_data_structures.formats.cmpd import CompressedPakResource
+from retro_data_structures.formats.pak_gc import ResourceHeaders
 
 if TYPE_CHECKING:
     from retro_data_structures.game_check import Game
@@ -34,19 +35,6 @@ ConstructResourceHeader = Struct(
 )
 
 
-def _emitparse_header(code: construct.CodeGen) -> str:
-    code.append("ResourceHeader_Format = struct.Struct('>LLQLL')")
-    code.append(
-        """def _create_resource_header(compressed, asset_type, asset_id, size, offset):
-    return Container(compressed=compressed, asset_type=asset_type.to_bytes(4, "big").decode("ascii"),
-                     asset_id=asset_id, size=size, offset=offset)
-    """
-    )
-    return "_create_resource_header(*ResourceHeader_Format.unpack(io.read(24)))"
-
-
-ConstructResourceHeader._emitparse = _emitparse_header
-
 PAKNoData = Struct(
     _start=construct.Tell,  # Should always be 0x00
     _header=PAKHeader,
@@ -66,7 +54,7 @@ PAKNoData = Struct(
         ),
     ),
     _resources_start=construct.Tell,
-    resources=construct.Aligned(64, PrefixedArray(Int32ub, ConstructResourceHeader)),
+    resources=construct.Aligned(64, ResourceHeaders(ConstructResourceHeader, ">LLQLL")),
     _resources_end=construct.Tell,
 )
 
@@ -11,12 +11,12 @@ from retro_data_structures.game_check import AssetIdCorrect, Game
 SavedStateDescriptor = construct.Struct(
     # TODO: guid for mp3+
     instance_id=Int32ub,
-)
+).compile()
 
 LayerToggle = construct.Struct(
     area_id=Int32ub,
     layer_index=Int32ub,
-)
+).compile()
 
 ScannableObject = construct.Struct(
     scan_asset_id=AssetIdCorrect,
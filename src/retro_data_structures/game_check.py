@@ -4,9 +4,10 @@ For checking which game is being parsed
 
 from __future__ import annotations
 
+import functools
 import typing
 import uuid
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import Any
 
 from construct.core import IfThenElse
@@ -23,58 +24,25 @@ if typing.TYPE_CHECKING:
     from retro_data_structures.base_resource import AssetId
 
 
-class Game(Enum):
+class Game(IntEnum):
     PRIME = 1
     ECHOES = 2
     CORRUPTION = 3
     PRIME_REMASTER = 10
 
-    def __ge__(self, other):
-        if self.__class__ is other.__class__:
-            return self.value >= other.value
-        return NotImplemented
+    # Keep printing as `Game.PRIME` instead of the plain int
+    __str__ = Enum.__str__
+    __format__ = Enum.__format__
 
-    def __gt__(self, other):
-        if self.__class__ is other.__class__:
-            return self.value > other.value
-        return NotImplemented
-
-    def __le__(self, other):
-        if self.__class__ is other.__class__:
-            return self.value <= other.value
-        return NotImplemented
-
-    def __lt__(self, other):
-        if self.__class__ is other.__class__:
-            return self.value < other.value
-        return NotImplemented
-
-    @property
-    def uses_asset_id_32(self):
-        return self <= Game.ECHOES
-
-    @property
-    def uses_asset_id_64(self):
-        return self == Game.CORRUPTION
-
-    @property
-    def uses_guid_as_asset_id(self):
-        return self == Game.PRIME_REMASTER
-
-    @property
-    def uses_lzo(self):
-        return self in {Game.ECHOES, Game.CORRUPTION}
+    # Plain attributes, assigned to each member below the class body
+    uses_asset_id_32: bool
+    uses_asset_id_64: bool
+    uses_guid_as_asset_id: bool
+    uses_lzo: bool
 
     @property
     def invalid_asset_id(self) -> int | uuid.UUID:
-        if self.uses_asset_id_32:
-            return (1 << 32) - 1
-        elif self.uses_asset_id_64:
-            return (1 << 64) - 1
-        elif self.uses_guid_as_asset_id:
-            return uuid.UUID(int=0)
-        else:
-            raise NotImplementedError
+        return _INVALID_ASSET_ID[self]
 
     def hash_asset_id(self, asset_name: str) -> AssetId:
         if self.uses_guid_as_asset_id:
@@ -85,16 +53,11 @@ class Game(Enum):
             return crc32(asset_name)
 
     def is_valid_asset_id(self, asset_id: int | uuid.UUID) -> bool:
-        if self <= Game.ECHOES and asset_id == 0:
-            return False
-        return asset_id != self.invalid_asset_id
+        return asset_id not in _INVALID_ASSET_IDS[self]
 
     @property
     def mlvl_dependencies_to_ignore(self) -> tuple[AssetId]:
-        if self == Game.ECHOES:
-            # Textures/Misc/VisorSteamQtr.TXTR
-            return (0x7B2EA5B1,)
-        return ()
+        return _MLVL_DEPENDENCIES_TO_IGNORE.get(self, ())
 
     def audio_group_dependencies(self):
         if self == Game.ECHOES:
@@ -119,6 +82,32 @@ class Game(Enum):
                 yield Dependency("ANIM", 0x1A9CCDD5, True)
 
 
+for _game in Game:
+    _game.uses_asset_id_32 = _game <= Game.ECHOES
+    _game.uses_asset_id_64 = _game == Game.CORRUPTION
+    _game.uses_guid_as_asset_id = _game == Game.PRIME_REMASTER
+    _game.uses_lzo = _game in (Game.ECHOES, Game.CORRUPTION)
+del _game
+
+_INVALID_ASSET_ID: dict[Game, int | uuid.UUID] = {
+    Game.PRIME: (1 << 32) - 1,
+    Game.ECHOES: (1 << 32) - 1,
+    Game.CORRUPTION: (1 << 64) - 1,
+    Game.PRIME_REMASTER: uuid.UUID(int=0),
+}
+
+# Prime and Echoes also treat 0 as a missing asset
+_INVALID_ASSET_IDS: dict[Game, frozenset[int | uuid.UUID]] = {
+    game: frozenset([invalid, 0]) if game <= Game.ECHOES else frozenset([invalid])
+    for game, invalid in _INVALID_ASSET_ID.items()
+}
+
+_MLVL_DEPENDENCIES_TO_IGNORE: dict[Game, tuple[AssetId]] = {
+    # Textures/Misc/VisorSteamQtr.TXTR
+    Game.ECHOES: (0x7B2EA5B1,),
+}
+
+
 def get_current_game(ctx) -> Game:
     result = ctx["_params"]["target_game"]
     if not isinstance(result, Game):
@@ -127,18 +116,19 @@ def get_current_game(ctx) -> Game:
     return result
 
 
-def is_prime1(ctx):
-    return get_current_game(ctx) == Game.PRIME
-
+def _is_game(target: Game) -> Callable[[Any], bool]:
+    def result(ctx):
+        return get_current_game(ctx) is target
 
-def is_prime2(ctx):
-    return get_current_game(ctx) == Game.ECHOES
+    return result
 
 
-def is_prime3(ctx):
-    return get_current_game(ctx) == Game.CORRUPTION
+is_prime1 = _is_game(Game.PRIME)
+is_prime2 = _is_game(Game.ECHOES)
+is_prime3 = _is_game(Game.CORRUPTION)
 
 
+@functools.cache
 def current_game_at_most(target: Game) -> Callable[[Any], bool]:
     def result(ctx):
         return get_current_game(ctx) <= target
@@ -146,6 +136,7 @@ def current_game_at_most(target: Game) -> Callable[[Any], bool]:
     return result
 
 
+@functools.cache
 def current_game_at_least(target: Game) -> Callable[[Any], bool]:
     def result(ctx):
         return get_current_game(ctx) >= target
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from construct import GreedyBytes, Int32ub
+
+from retro_data_structures.construct_extensions.alignment import AlignedPrefixed
+
+
+def test_aligned_prefixed_length_size():
+    # Pads the data until its size minus length_size is a multiple of the modulus: (10 + 2 - 4) % 8 == 0
+    con = AlignedPrefixed(Int32ub, GreedyBytes, 8, 4, b"\xff")
+
+    data = con.build(b"0123456789")
+    assert data == b"\x00\x00\x00\x0c0123456789\xff\xff"
+    assert con.parse(data) == b"0123456789\xff\xff"
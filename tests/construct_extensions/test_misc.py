@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import construct
+
+from retro_data_structures.construct_extensions.misc import LabeledOptional, PrefixedPodArray
+
+
+def test_labeled_optional():
+    con = construct.Sequence(LabeledOptional(b"LBL", construct.Int16ub), construct.Byte)
+
+    assert con.parse(b"LBL\x00\x05\x07") == [5, 7]
+    assert con.parse(b"\x07") == [None, 7]
+    assert con.build([5, 7]) == b"LBL\x00\x05\x07"
+    assert con.build([None, 7]) == b"\x07"
+
+
+def test_prefixed_pod_array():
+    con = PrefixedPodArray(construct.Int32ub, "f", 3)
+    data = con.build([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+    assert data == construct.PrefixedArray(construct.Int32ub, construct.Array(3, construct.Float32b)).build(
+        [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    )
+    assert con.parse(data) == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import pytest
+from construct import Container
 from tests import test_lib
 
 from retro_data_structures.base_resource import Dependency
 from retro_data_structures.construct_extensions.json import convert_to_raw_python
-from retro_data_structures.formats.anim import Anim
+from retro_data_structures.formats.anim import ANIM, Anim
+from retro_data_structures.game_check import Game
 
 
 def test_compare_p2(prime2_asset_manager):
@@ -60,3 +63,130 @@ def test_missile_launcher(prime1_asset_manager, prime2_asset_manager):
 def test_no_dependencies(prime2_asset_manager):
     result = list(prime2_asset_manager.get_dependencies_for_asset(0x5E2F550E))
     assert result == [Dependency(type="ANIM", id=0x5E2F550E)]
+
+
+def _channel_bits(widths: tuple[int, int, int] | None) -> Container | None:
+    if widths is None:
+        return None
+    return Container(
+        initial_x=0x1234,
+        delta_x=widths[0],
+        initial_y=0x5678,
+        delta_y=widths[1],
+        initial_z=0x9ABC,
+        delta_z=widths[2],
+    )
+
+
+def _channel_values(widths: tuple[int, int, int] | None, seed: int) -> Container | None:
+    if widths is None:
+        return None
+    x, y, z = ((seed * 0x9E3779B1 + i * 0x7F4A7C15) % (1 << width) for i, width in enumerate(widths))
+    return Container(x=x, y=y, z=z)
+
+
+def _compressed_anim(game: Game) -> Container:
+    is_prime2 = game == Game.ECHOES
+
+    # (rotation, translation, scale) widths of each bone. Channels without a kind of key have a count of 0, and the
+    # widths add up to values that straddle the 32-bit blocks of the stream.
+    bones = [
+        ((13, 17, 11), (9, 21, 7), (5, 19, 23)),
+        (None, (15, 15, 15), (3, 3, 3)),
+        ((3, 5, 31), None, None),
+    ]
+    if not is_prime2:
+        bones = [(rotation, translation, None) for rotation, translation, _ in bones]
+
+    descriptors = [
+        Container(
+            bone_id=bone_id,
+            rotation_keys_count=0 if rotation is None else 2,
+            rotation_keys=_channel_bits(rotation),
+            translation_keys_count=0 if translation is None else 3,
+            translation_keys=_channel_bits(translation),
+            scale_keys_count=(0 if scale is None else 4) if is_prime2 else None,
+            scale_keys=_channel_bits(scale) if is_prime2 else None,
+        )
+        for bone_id, (rotation, translation, scale) in enumerate(bones)
+    ]
+
+    keys = []
+    for key_index in range(4):
+        if key_index == 1:
+            keys.append(Container(channels=None))
+            continue
+
+        keys.append(
+            Container(
+                channels=[
+                    Container(
+                        rotation=None
+                        if rotation is None
+                        else Container(wsign=key_index % 2, data=_channel_values(rotation, key_index * 3 + bone_id)),
+                        translation=_channel_values(translation, key_index * 5 + bone_id),
+                        scale=_channel_values(scale, key_index * 7 + bone_id),
+                    )
+                    for bone_id, (rotation, translation, scale) in enumerate(bones)
+                ]
+            )
+        )
+
+    return Container(
+        anim_version=2,
+        anim=Container(
+            scratch_size=0,
+            event_id=None if is_prime2 else 0x12345678,
+            unk_1=None if is_prime2 else 1,
+            unk_2=0x0101 if is_prime2 else None,
+            duration=1.5,
+            interval=0.5,
+            root_bone_id=0,
+            looping_flag=1,
+            rotation_divisor=0x8000,
+            translation_multiplier=0.25,
+            scale_multiplier=0.125 if is_prime2 else None,
+            unk_3=0,
+            _key_bitmap_array=[True] + [key.channels is not None for key in keys],
+            bone_channel_descriptors=descriptors,
+            animation_keys=keys,
+        ),
+        trailing_bytes=[],
+    )
+
+
+# Built by the BitwiseWith32Blocks based implementation that AnimationKeys replaced
+_PRIME_COMPRESSED_ANIM = bytes.fromhex(
+    "00000002000000b812345678000000013fc000003f0000000000000000000001000080003e8000000000000300000000"
+    "000000050000001b000000030000000300000000000212340d5678119abc0b00031234095678159abc07000000010000"
+    "000312340f56780f9abc0f0000000200021234035678059abc1f0000541f00003e500150e367aaa84db8ec751d7c0ddd"
+    "e3559163caab829665714ff3a34c1adba30a0f7061e7394d57d71bb936482eb9cc949d02cef521d500000a34"
+)
+
+_ECHOES_COMPRESSED_ANIM = bytes.fromhex(
+    "00000002000000d501013fc000003f0000000000000000000001000080003e8000003e00000000000003000000000000"
+    "00050000001b0000000300000212340d5678119abc0b00031234095678159abc0700041234055678139abc1701000000"
+    "0312340f56780f9abc0f00041234035678039abc030200021234035678059abc1f00000000541f00003e5001501f202a"
+    "a8d507ca54763af1b3dd4ce6dc631d7c0d96e35591f3caab821e26714fb86fe6e6a60d6db20f7087d1394da30a1bb961"
+    "e72eb957d72cf77a481b3d73e1e64a4e81f521d19a000a34ce"
+)
+
+
+@pytest.mark.parametrize(
+    ("game", "expected"),
+    [
+        (Game.PRIME, _PRIME_COMPRESSED_ANIM),
+        (Game.ECHOES, _ECHOES_COMPRESSED_ANIM),
+    ],
+)
+def test_compressed_animation_keys(game: Game, expected: bytes):
+    anim = _compressed_anim(game)
+
+    assert ANIM.build(anim, target_game=game) == expected
+
+    parsed = ANIM.parse(expected, target_game=game)
+    assert convert_to_raw_python(parsed.anim.bone_channel_descriptors) == convert_to_raw_python(
+        anim.anim.bone_channel_descriptors
+    )
+    assert convert_to_raw_python(parsed.anim.animation_keys) == convert_to_raw_python(anim.anim.animation_keys)
+    assert ANIM.build(parsed, target_game=game) == expected
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import pytest
+
+from retro_data_structures.formats.mapw import Mapw
+from retro_data_structures.game_check import Game
+
+
+@pytest.mark.parametrize(
+    ("game", "asset_ids"),
+    [
+        (Game.ECHOES, [0x12345678, 0xFFFFFFFF]),
+        (Game.CORRUPTION, [0x123456789ABCDEF0, 0xFFFFFFFFFFFFFFFF]),
+    ],
+)
+def test_parse_build(game: Game, asset_ids: list[int]) -> None:
+    width = 8 if game >= Game.CORRUPTION else 4
+    raw = b"\xde\xad\xf0\x0d\x00\x00\x00\x01" + len(asset_ids).to_bytes(4, "big")
+    raw += b"".join(asset_id.to_bytes(width, "big") for asset_id in asset_ids)
+
+    decoded = Mapw.parse(raw, game)
+    assert list(decoded.mapa_ids) == asset_ids
+    assert decoded.get_mapa_id(1) == asset_ids[1]
+    assert decoded.build() == raw
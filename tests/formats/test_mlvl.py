@@ -62,73 +62,66 @@ _EXPECTED_DEPENDENCY = {
 
 def _write_to_file(data: dict, path: pathlib.Path):
     path.parent.mkdir(exist_ok=True, parents=True)
-    path.touch()
-
-    with path.open("w") as of:
-        json.dump(data, of, indent=4)
+    path.write_text(json.dumps(data, indent=4))
 
 
 @pytest.mark.skip_dependency_tests
-def test_mlvl_dependencies(prime2_asset_manager: AssetManager):
+@pytest.mark.parametrize("mlvl_id", _MLVLS, ids=hex)
+def test_mlvl_dependencies(prime2_asset_manager: AssetManager, mlvl_id: AssetId):
     print()
     total_elapsed = 0.0
 
     write_reports = os.environ.get("WRITE_DEPENDENCIES_REPORTS", "") != ""
 
-    world_reports = {}
-
-    for mlvl_id in _MLVLS:
-        mlvl = prime2_asset_manager.get_file(mlvl_id, Mlvl)
-        logging.info(mlvl.world_name)
-        world_reports[mlvl.world_name] = {}
-
-        for area in mlvl.areas:
-            old = area.dependencies_by_layer
-            old = {layer_name: {(dep.type, hex(dep.id)) for dep in layer} for layer_name, layer in old.items()}
-
-            start = time.time()
-            area.build_mlvl_dependencies()
-            elapsed = time.time() - start
-            total_elapsed += elapsed
-
-            new = area.dependencies_by_layer
-            new = {layer_name: {(dep.type, hex(dep.id)) for dep in layer} for layer_name, layer in new.items()}
-
-            missing = {
-                layer_name: old_layer.difference(new_layer)
-                for (layer_name, old_layer), new_layer in zip(old.items(), new.values())
-            }
-            extra = {
-                layer_name: new_layer.difference(old_layer)
-                for (layer_name, old_layer), new_layer in zip(old.items(), new.values())
-            }
-            missing = {n: miss for n, miss in missing.items() if miss}
-            extra = {n: ext for n, ext in extra.items() if ext}
-
-            f = pathlib.Path(f"area_deps/{mlvl.world_name}/{area.name}.json")
-            msg = f"    {area.name} ({elapsed:.3f}s)"
-            if missing or extra:
-                if missing:
-                    logging.error(msg)
-                elif extra:
-                    logging.warning(msg)
-
-                world_reports[mlvl.world_name][area.name] = {"missing": missing, "extra": extra}
-                if write_reports:
-                    _write_to_file(
-                        {
-                            "missing": {n: list(miss) for n, miss in missing.items() if miss},
-                            "extra": {n: list(ext) for n, ext in extra.items() if ext},
-                        },
-                        f,
-                    )
-            else:
-                logging.info(msg)
-                if write_reports:
-                    f.unlink(missing_ok=True)
+    mlvl = prime2_asset_manager.get_file(mlvl_id, Mlvl)
+    logging.info(mlvl.world_name)
+    world_report = {}
+
+    for area in mlvl.areas:
+        old = area.dependencies_by_layer
+        old = {layer_name: {(dep.type, dep.id) for dep in layer} for layer_name, layer in old.items()}
+
+        start = time.time()
+        area.build_mlvl_dependencies()
+        elapsed = time.time() - start
+        total_elapsed += elapsed
+
+        new = area.dependencies_by_layer
+        new = {layer_name: {(dep.type, dep.id) for dep in layer} for layer_name, layer in new.items()}
+
+        missing = {}
+        extra = {}
+        for (layer_name, old_layer), new_layer in zip(old.items(), new.values()):
+            # Only format the ids of the few dependencies that differ
+            if miss := old_layer - new_layer:
+                missing[layer_name] = {(typ, hex(asset_id)) for typ, asset_id in miss}
+            if ext := new_layer - old_layer:
+                extra[layer_name] = {(typ, hex(asset_id)) for typ, asset_id in ext}
+
+        f = pathlib.Path(f"area_deps/{mlvl.world_name}/{area.name}.json")
+        msg = f"    {area.name} ({elapsed:.3f}s)"
+        if missing or extra:
+            if missing:
+                logging.error(msg)
+            elif extra:
+                logging.warning(msg)
+
+            world_report[area.name] = {"missing": missing, "extra": extra}
+            if write_reports:
+                _write_to_file(
+                    {
+                        "missing": {n: list(miss) for n, miss in missing.items() if miss},
+                        "extra": {n: list(ext) for n, ext in extra.items() if ext},
+                    },
+                    f,
+                )
+        else:
+            logging.info(msg)
+            if write_reports:
+                f.unlink(missing_ok=True)
 
     logging.info(f"Total elapsed time: {total_elapsed}")
-    assert world_reports == _EXPECTED_DEPENDENCY
+    assert world_report == _EXPECTED_DEPENDENCY[mlvl.world_name]
 
 
 _EXPECTED_MODULES = {
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import construct
 import pytest
 
 from retro_data_structures.base_resource import Dependency
 from retro_data_structures.formats.pak import Pak
-from retro_data_structures.formats.pak_gc import PAK_GC, CompressedPakResource, PakBody, PakFile, PAKNoData
+from retro_data_structures.formats.pak_gc import (
+    PAK_GC,
+    CompressedPakResource,
+    ConstructResourceHeader,
+    PakBody,
+    PakFile,
+    PAKNoData,
+    ResourceHeaders,
+)
 from retro_data_structures.game_check import Game
 
 # ruff: noqa: E501
@@ -508,3 +517,16 @@ def test_compare_from_build():
             source_file.compressed_data += b"\xff" * pad
 
     assert decoded == source
+
+
+def test_resource_headers():
+    resources = [
+        {"compressed": 1, "asset_type": "TXTR", "asset_id": 0x1234, "size": 64, "offset": 32},
+        {"compressed": 0, "asset_type": "CMDL", "asset_id": 0xFFFFFFFF, "size": 32, "offset": 96},
+    ]
+    reference = construct.PrefixedArray(construct.Int32ub, ConstructResourceHeader)
+    fast = ResourceHeaders(ConstructResourceHeader, ">LLLLL")
+
+    data = fast.build(resources)
+    assert data == reference.build(resources)
+    assert [dict(r) for r in fast.parse(data)] == resources
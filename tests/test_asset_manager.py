@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import json
 import os
 from typing import TYPE_CHECKING
 
 import nod
+import pytest
 
-from retro_data_structures.asset_manager import IsoFileProvider, PathFileProvider
+from retro_data_structures.asset_manager import AssetManager, IsoFileProvider, PathFileProvider
+from retro_data_structures.base_resource import RawResource
+from retro_data_structures.formats import pak_gc, pak_wii
+from retro_data_structures.formats.pak import Pak
+from retro_data_structures.game_check import Game
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from pathlib import Path
 
 
@@ -26,3 +33,123 @@ def test_identical_provider_prime2(prime2_iso: Path, tmp_path: Path) -> None:
     path_provider = PathFileProvider(extract_path)
 
     assert sorted(iso_provider.rglob("*")) == sorted(path_provider.rglob("*"))
+
+
+def _write_pak_header(path: Path, asset_id: int) -> None:
+    path.write_bytes(
+        pak_gc.PAKNoData.build(
+            {
+                "_header": {},
+                "named_resources": [],
+                "resources": [
+                    {"compressed": 0, "asset_type": "TXTR", "asset_id": asset_id, "size": 0, "offset": 0},
+                ],
+            }
+        )
+    )
+
+
+def _write_pak(path: Path, asset_id: int, game: Game, data: bytes = b"original data", compressed: bool = False) -> None:
+    pak_format = pak_wii if game >= Game.CORRUPTION else pak_gc
+    files = [pak_format.PakFile(asset_id, "TXTR", compressed, data, None)]
+    if game >= Game.CORRUPTION:
+        body = pak_wii.PakBody(md5_hash=b"\x00" * 16, named_resources=[], files=files)
+    else:
+        body = pak_gc.PakBody(named_resources={}, files=files)
+    path.write_bytes(Pak(body, game).build())
+
+
+def test_header_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    tmp_path.joinpath("files").mkdir()
+    _write_pak_header(tmp_path.joinpath("files", "Test.pak"), 0x1234)
+    _write_pak_header(tmp_path.joinpath("files", "Other.pak"), 0x5678)
+    cache_path = tmp_path.joinpath("header_cache.json")
+
+    manager = AssetManager(PathFileProvider(tmp_path), Game.PRIME, header_cache=cache_path)
+    assert manager.get_asset_type(0x1234) == "TXTR"
+    assert list(manager.find_paks(0x5678)) == ["Other.pak"]
+    assert cache_path.is_file()
+
+    # The headers aren't parsed again when the cache is valid
+    monkeypatch.setattr(Pak, "header_for_game", None)
+    cached_manager = AssetManager(PathFileProvider(tmp_path), Game.PRIME, header_cache=cache_path)
+    assert cached_manager.get_asset_type(0x1234) == "TXTR"
+    assert list(cached_manager.find_paks(0x1234)) == ["Test.pak"]
+    assert list(cached_manager.find_paks(0x5678)) == ["Other.pak"]
+
+
+@pytest.mark.parametrize(
+    "make_paks",
+    [
+        lambda fingerprint: [],
+        lambda fingerprint: {"Test.pak": []},
+        lambda fingerprint: {"Test.pak": {"fingerprint": fingerprint, "resources": [[0x1234, "TXTR", 0]]}},
+    ],
+)
+def test_header_cache_wrong_shape(tmp_path: Path, make_paks: Callable[[object], object]) -> None:
+    tmp_path.joinpath("files").mkdir()
+    _write_pak_header(tmp_path.joinpath("files", "Test.pak"), 0x1234)
+    cache_path = tmp_path.joinpath("header_cache.json")
+
+    AssetManager(PathFileProvider(tmp_path), Game.PRIME, header_cache=cache_path)
+    data = json.loads(cache_path.read_text())
+    data["paks"] = make_paks(data["paks"]["Test.pak"]["fingerprint"])
+    cache_path.write_text(json.dumps(data))
+
+    # A cache with the right version but the wrong contents is ignored
+    manager = AssetManager(PathFileProvider(tmp_path), Game.PRIME, header_cache=cache_path)
+    assert manager.get_asset_type(0x1234) == "TXTR"
+
+
+@pytest.mark.parametrize("game", [Game.PRIME, Game.ECHOES, Game.CORRUPTION])
+def test_get_raw_asset_without_loading_pak(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, game: Game) -> None:
+    tmp_path.joinpath("files").mkdir()
+    _write_pak(tmp_path.joinpath("files", "Test.pak"), 0x10, game, b"plain data")
+    _write_pak(tmp_path.joinpath("files", "Other.pak"), 0x20, game, b"compressed data" * 20, compressed=True)
+    manager = AssetManager(PathFileProvider(tmp_path), game)
+
+    # Single assets are read without parsing the entire PAK
+    monkeypatch.setattr(Pak, "parse_stream", None)
+    plain = manager.get_raw_asset(0x10)
+    compressed = manager.get_raw_asset(0x20)
+    monkeypatch.undo()
+
+    assert plain == manager.get_pak("Test.pak").get_asset(0x10)
+    assert compressed == manager.get_pak("Other.pak").get_asset(0x20)
+
+
+def test_custom_asset_name_after_resolving(tmp_path: Path) -> None:
+    tmp_path.joinpath("files").mkdir()
+    _write_pak_header(tmp_path.joinpath("files", "Test.pak"), 0x1234)
+    manager = AssetManager(PathFileProvider(tmp_path), Game.PRIME)
+
+    # Resolve the name before it's registered, so the lookup below must not reuse that result
+    assert not manager.does_asset_exists("custom.TXTR")
+    manager.register_custom_asset_name("custom.TXTR", 0x4321)
+
+    assert manager.add_new_asset("custom.TXTR", RawResource("TXTR", b"custom data")) == 0x4321
+    assert manager.does_asset_exists("custom.TXTR")
+    assert manager.get_raw_asset("custom.TXTR") == manager.get_raw_asset(0x4321)
+
+
+def test_delete_ensured_asset(tmp_path: Path) -> None:
+    tmp_path.joinpath("files").mkdir()
+    _write_pak(tmp_path.joinpath("files", "Test.pak"), 0x1234, Game.PRIME)
+    _write_pak(tmp_path.joinpath("files", "Other.pak"), 0x5678, Game.PRIME)
+
+    manager = AssetManager(PathFileProvider(tmp_path), Game.PRIME)
+    manager.ensure_present("Other.pak", 0x1234)
+    manager.ensure_present("Test.pak", 0x5678)
+    manager.delete_asset(0x1234)
+    manager.replace_asset(0x5678, RawResource("TXTR", b"new data"))
+
+    output_path = tmp_path.joinpath("out")
+    output_path.mkdir()
+    manager.save_modifications(output_path)
+
+    test_pak = Pak.parse(output_path.joinpath("Test.pak").read_bytes(), Game.PRIME)
+    other_pak = Pak.parse(output_path.joinpath("Other.pak").read_bytes(), Game.PRIME)
+    assert test_pak.get_asset(0x1234) is None
+    assert other_pak.get_asset(0x1234) is None
+    assert test_pak.get_asset(0x5678).data.startswith(b"new data")
+    assert other_pak.get_asset(0x5678).data.startswith(b"new data")
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from retro_data_structures import crc
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        ("", 0xFFFFFFFF),
+        ("Worlds/IntroLevel", 0xAA7E0868),
+        (b"\x00\xff\x10", 0x8E2DCBFB),
+    ],
+)
+def test_crc32(data: bytes | str, expected: int):
+    assert crc.crc32(data) == expected
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        ("", 0xFFFFFFFFFFFFFFFF),
+        ("Worlds/IntroLevel", 0x11435A84AE106EBB),
+        (b"\x00\xff\x10", 0x35DFEDE5EB38272E),
+    ],
+)
+def test_crc64(data: bytes | str, expected: int):
+    assert crc.crc64(data) == expected
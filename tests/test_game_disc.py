@@ -1,36 +1,62 @@
 from __future__ import annotations
 
 import hashlib
-from typing import TYPE_CHECKING
-
-from retro_data_structures.disc import game_disc
-
-if TYPE_CHECKING:
-    from pathlib import Path
+import io
+
+import pytest
+from Crypto.Cipher import AES
+
+from retro_data_structures.disc import game_disc, wii_disc
+
+
+@pytest.mark.parametrize(
+    ("iso_fixture", "expected_digest"),
+    [
+        (
+            "prime1_iso",
+            b"wz\x83\n8\xa1\xd2\x07\x11i\x85g\xff\x89X\xfbO\xe7$\x1ar?J\x18\xe25YP\xd7\x9f\xc8V",
+        ),
+        (
+            "prime2_iso",
+            b"v!\xe7W\x1e\x0e\xe4\xe0\x98\xa4\x0b\xc8\xa0\xa3dx\x11\xbd\x94NC\x02R)Bl}\xea\xe1v\x06\x84",
+        ),
+        (
+            "prime3_iso",
+            b'kU\x0f"\x16\x02\x07GG\xa2\xe6\x1b\n\xa0d ?\xd4\x93\xf6\x86]\xfb;\x1a\x91&\x82\x06^a\x04',
+        ),
+    ],
+)
+def test_dol(request: pytest.FixtureRequest, iso_fixture: str, expected_digest: bytes) -> None:
+    disc = game_disc.GameDisc.parse(request.getfixturevalue(iso_fixture))
+    disc_dol = disc.get_dol()
 
+    assert hashlib.sha256(disc_dol).digest() == expected_digest
 
-def test_prime1_dol(prime1_iso: Path) -> None:
-    disc = game_disc.GameDisc.parse(prime1_iso)
-    disc_dol = disc.get_dol()
 
-    assert hashlib.sha256(disc_dol).digest() == (
-        b"wz\x83\n8\xa1\xd2\x07\x11i\x85g\xff\x89X\xfbO\xe7$\x1ar?J\x18\xe25YP\xd7\x9f\xc8V"
-    )
+def _encrypted_partition(key: bytes, blocks: list[bytes]) -> bytes:
+    result = bytearray()
+    for i, block in enumerate(blocks):
+        iv = bytes([i]) * 16
+        header = bytearray(0x400)
+        header[0x3D0:0x3E0] = iv
+        result += header + AES.new(key, AES.MODE_CBC, iv=iv).encrypt(block)
+    return bytes(result)
 
 
-def test_prime2_dol(prime2_iso: Path) -> None:
-    disc = game_disc.GameDisc.parse(prime2_iso)
-    disc_dol = disc.get_dol()
+def test_encrypted_reader_across_blocks() -> None:
+    key = b"0123456789abcdef"
+    blocks = [bytes([i]) * 0x7C00 for i in range(1, 4)]
+    partition = _encrypted_partition(key, blocks)
 
-    assert hashlib.sha256(disc_dol).digest() == (
-        b"v!\xe7W\x1e\x0e\xe4\xe0\x98\xa4\x0b\xc8\xa0\xa3dx\x11\xbd\x94NC\x02R)Bl}\xea\xe1v\x06\x84"
-    )
+    with wii_disc.EncryptedDiscFileReader(io.BytesIO(partition), 0x200, key, 0, 0x7B00) as reader:
+        assert reader.read() == b"\x01" * 0x100 + b"\x02" * 0x100
 
 
-def test_prime3_dol(prime3_iso: Path) -> None:
-    disc = game_disc.GameDisc.parse(prime3_iso)
-    disc_dol = disc.get_dol()
+def test_encrypted_reader_truncated_partition() -> None:
+    key = b"0123456789abcdef"
+    blocks = [bytes([i]) * 0x7C00 for i in range(1, 4)]
+    partition = _encrypted_partition(key, blocks)[:-0x100]
 
-    assert hashlib.sha256(disc_dol).digest() == (
-        b'kU\x0f"\x16\x02\x07GG\xa2\xe6\x1b\n\xa0d ?\xd4\x93\xf6\x86]\xfb;\x1a\x91&\x82\x06^a\x04'
-    )
+    with wii_disc.EncryptedDiscFileReader(io.BytesIO(partition), 3 * 0x7C00, key, 0, 0) as reader:
+        with pytest.raises(OSError, match="Unexpected end of partition while reading block 2"):
+            reader.read()